@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+import requests
+from html import escape
+from typing import Dict, List, Optional, Tuple
+import random
+
+# Base of the nof job links, the nof scraper keeps the first 23 characters
+NOF_BASE_URL = "https://nofluffjobs.com/hu/"
+PRF_BASE_URL = "https://www.profession.hu/"
+
+TITLES = [
+    "Data Engineer",
+    "Senior Data Engineer",
+    "Junior Data Engineer",
+    "Big Data Engineer",
+    "Python Developer",
+    "Backend Developer",
+    "Data Analyst",
+    "DevOps Engineer",
+    "Machine Learning Engineer",
+    "Data Scientist",
+]
+COMPANIES = [f"Company {num}" for num in range(200)]
+TECHS = [
+    "Python",
+    "SQL",
+    "Spark",
+    "AWS",
+    "Azure",
+    "GCP",
+    "Airflow",
+    "Kafka",
+    "Docker",
+    "Kubernetes",
+    "Scala",
+    "Java",
+    "Databricks",
+    "Snowflake",
+    "dbt",
+    "Terraform",
+    "Git",
+    "Linux",
+    "Hadoop",
+    "Power BI",
+    "Angol (B2)",
+    "Angol C1",
+    "angol",
+]
+# Markup around the job data of a real page: scripts, navigation and footer
+NOISE = (
+    "<script>window.dataLayer = window.dataLayer || [];"
+    + "var tracking = {'page': 'list', 'items': []};" * 20
+    + "</script>"
+    + "<nav><ul>"
+    + "".join(
+        f'<li class="menu"><a href="/menu/{num}">Menu {num}</a></li>'
+        for num in range(40)
+    )
+    + "</ul></nav>"
+    + "<footer>"
+    + "".join(f"<p class='footer'>Footer paragraph {num}</p>" for num in range(30))
+    + "</footer>"
+)
+SUMMARY = (
+    "We are looking for a colleague to build and run the data pipelines of our "
+    "analytics platform, working with the product and data science teams. "
+)
+
+
+def make_job(rng: random.Random, num: int) -> Dict:
+    """Return the data of a synthetic job posting"""
+    return {
+        "job_title": rng.choice(TITLES),
+        "company_name": rng.choice(COMPANIES),
+        "job_summary": SUMMARY * rng.randint(1, 3),
+        "job_id": f"job-{num}",
+        "job_tech_stack": rng.sample(TECHS, rng.randint(3, 10)),
+    }
+
+
+def prf_listing_page(jobs: List[Dict]) -> str:
+    """Return a prf result page listing the jobs"""
+    items = "".join(
+        f'<li class="card" data-prof-name="{escape(job["job_title"])}" '
+        f'data-item-brand="{escape(job["company_name"])}" '
+        f'data-link="{PRF_BASE_URL}allas/{job["job_id"]}">'
+        f'<div class="job-card__title"><h2>{escape(job["job_title"])}</h2></div>'
+        f'<div class="job-card__text">{escape(job["job_summary"])}</div>'
+        "</li>"
+        for job in jobs
+    )
+    return (
+        f"<html><head><title>Results</title></head><body>{NOISE}"
+        f'<ul class="job-cards">{items}</ul>'
+        '<ul class="pagination"><li><a>1</a></li><li><a>2</a></li></ul>'
+        f"{NOISE}</body></html>"
+    )
+
+
+def prf_subpage(job: Dict) -> str:
+    """Return the prf subpage of the job"""
+    techs = "".join(f"<span>{escape(tech)}</span>" for tech in job["job_tech_stack"])
+    return (
+        f"<html><body>{NOISE}<h1>{escape(job['job_title'])}</h1>"
+        f"<div class='details'><span><img alt='technologies' src='t.svg'></span>"
+        f"<div>{techs}</div></div><p>{escape(job['job_summary'])}</p>"
+        f"{NOISE}</body></html>"
+    )
+
+
+def nof_listing_page(jobs: List[Dict]) -> str:
+    """Return a nof result page listing the jobs"""
+    items = "".join(
+        f'<a class="posting-list-item" href="/hu/job/{job["job_id"]}">'
+        f'<h3 class="posting-title__position">{escape(job["job_title"])}</h3>'
+        f'<span class="company">{escape(job["company_name"])}</span></a>'
+        for job in jobs
+    )
+    return (
+        f"<html><body>{NOISE}<div class='list-container'>{items}</div>"
+        '<ul class="pagination"><li><a class="page-link">1</a></li></ul>'
+        f"{NOISE}</body></html>"
+    )
+
+
+def nof_subpage(job: Dict) -> str:
+    """Return the nof subpage of the job"""
+    musts = "".join(f"<li>{escape(tech)}</li>" for tech in job["job_tech_stack"])
+    return (
+        f"<html><body>{NOISE}"
+        f'<a id="postingCompanyUrl" href="/company">{escape(job["company_name"])}</a>'
+        f'<section branch="musts"><ul>{musts}</ul></section>'
+        "<h2>Elvárások</h2><h2>A projekt rövid leírása</h2>"
+        f"<nfj-read-more><div>{escape(job['job_summary'])}</div></nfj-read-more>"
+        f"{NOISE}</body></html>"
+    )
+
+
+def make_site_pages(
+    site: str, pages: int, jobs_per_page: int, seed: int = 0
+) -> Tuple[List[str], Dict[str, str]]:
+    """Return the result pages of a site and its subpages by link"""
+    rng = random.Random(seed)
+    listing_page, subpage = {
+        "prf": (prf_listing_page, prf_subpage),
+        "nof": (nof_listing_page, nof_subpage),
+    }[site]
+    job_link = {
+        "prf": lambda job: f"{PRF_BASE_URL}allas/{job['job_id']}",
+        "nof": lambda job: f"{NOF_BASE_URL[:23]}/hu/job/{job['job_id']}",
+    }[site]
+    listing_pages, subpages = [], {}
+    for page_num in range(pages):
+        jobs = [
+            make_job(rng, page_num * jobs_per_page + num)
+            for num in range(jobs_per_page)
+        ]
+        listing_pages.append(listing_page(jobs))
+        subpages.update((job_link(job), subpage(job)) for job in jobs)
+    return listing_pages, subpages
+
+
+def html_response(url: str, body: str, status: int = 200) -> requests.Response:
+    """Build the response of a page as the transport returns it"""
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response._content = body.encode("utf-8")
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    return response
+
+
+class FixtureTransport:
+    """Transport serving the fixture pages from memory, without network access"""
+
+    def __init__(self, pages: Dict[str, str]):
+        self.responses = {url: html_response(url, body) for url, body in pages.items()}
+
+    def get(self, url: str, cached: bool = False, **kwargs) -> requests.Response:
+        return self.responses.get(url) or html_response(url, "", status=404)
+
+    def close(self) -> None:
+        pass
+
+
+def make_job_table(
+    rows: int, seed: int = 0, duplicate_rate: float = 0.05
+) -> pd.DataFrame:
+    """Return a synthetic job table as the scrapers store it, with the tech stacks
+    as lists"""
+    rng = np.random.default_rng(seed)
+    tech_counts = rng.integers(3, 11, rows)
+    tech_indices = rng.integers(0, len(TECHS), int(tech_counts.sum()))
+    techs = np.array(TECHS, dtype=object)[tech_indices]
+    tech_stacks = [
+        stack.tolist() for stack in np.split(techs, np.cumsum(tech_counts)[:-1])
+    ]
+    job_links = [f"{PRF_BASE_URL}allas/job-{num}" for num in range(rows)]
+    duplicates: List[Optional[str]] = [None] * rows
+    for num in np.flatnonzero(rng.random(rows) < duplicate_rate):
+        duplicates[num] = job_links[rng.integers(0, rows)]
+    return pd.DataFrame(
+        {
+            "job_title": np.array(TITLES, dtype=object)[
+                rng.integers(0, len(TITLES), rows)
+            ],
+            "company_name": np.array(COMPANIES, dtype=object)[
+                rng.integers(0, len(COMPANIES), rows)
+            ],
+            "job_summary": SUMMARY,
+            "job_link": job_links,
+            "job_tech_stack": tech_stacks,
+            "duplicate_of": duplicates,
+        }
+    )
@@ -0,0 +1,263 @@
+"""Offline benchmarks of the parsing, extraction, loading and analysis stages
+
+Run from the repository root, e.g.:
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --compare results.json
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the 'scripts' directory to sys.path, the modules import each other by name
+scripts_path = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"
+)
+if scripts_path not in sys.path:
+    sys.path.append(scripts_path)
+
+import main
+from analyze_data import analyze_tech_stack
+from base_scraper import Scraper
+from pagescrapers.nof_scraper import NofScraper
+from pagescrapers.prf_scraper import PrfScraper
+
+from benchmarks.fixtures import (
+    NOF_BASE_URL,
+    FixtureTransport,
+    make_job_table,
+    make_site_pages,
+)
+
+SCRAPERS = {"prf": PrfScraper, "nof": NofScraper}
+# Sizes of the synthetic job tables of the analysis
+ANALYSIS_ROWS = [10_000, 100_000, 1_000_000]
+LOAD_ROWS = 10_000
+# Result pages per site and jobs per result page of the fixtures
+PAGES = 5
+JOBS_PER_PAGE = 20
+# Timed runs of each benchmark, the fastest one is reported
+REPEAT = 3
+# Slowdown against the baseline reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+@contextmanager
+def nof_url_env() -> Iterator[None]:
+    """Set the NOF_URL the nof scraper builds its job links from, if it is unset"""
+    previous = os.environ.get("NOF_URL")
+    os.environ["NOF_URL"] = previous or NOF_BASE_URL
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["NOF_URL"]
+
+
+def measure(
+    name: str,
+    func: Callable[[], object],
+    items: int,
+    repeat: int = REPEAT,
+) -> Dict:
+    """Return the fastest time of the runs of func and its peak memory
+
+    The peak memory is traced in a separate run, so that the tracing does not
+    slow down the timed ones.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    seconds = min(timings)
+    result = {
+        "name": name,
+        "items": items,
+        "seconds": seconds,
+        "items_per_second": items / seconds if seconds else None,
+        "peak_mb": peak / 2**20,
+    }
+    print(
+        f"{name:<36} {items:>9} items {seconds * 1000:>10.1f} ms "
+        f"{result['items_per_second'] or 0:>12.0f}/s {result['peak_mb']:>8.1f} MB",
+        flush=True,
+    )
+    return result
+
+
+def make_scraper(site: str, pages: Dict[str, str], known: bool = False) -> Scraper:
+    """Return a scraper of the site reading the pages from memory
+
+    With known=True every subpage is known, so only the result pages are parsed.
+    """
+    return SCRAPERS[site](
+        "",
+        transport=FixtureTransport(pages),
+        known_links=set(pages) if known else None,
+    )
+
+
+def bench_listing(site: str, pages: int, jobs_per_page: int, repeat: int) -> List[Dict]:
+    """Benchmark the job extraction from the result pages of a site, without and
+    with the subpages"""
+    listing_pages, subpages = make_site_pages(site, pages, jobs_per_page)
+    job_count = pages * jobs_per_page
+
+    def extract(known: bool) -> Callable[[], None]:
+        def run() -> None:
+            scraper = make_scraper(site, subpages, known)
+            for markup in listing_pages:
+                soup = scraper.make_soup(markup, scraper.main_page_parse_only)
+                jobs = scraper.extract_job_info_from_result(soup)
+                assert len(jobs) == jobs_per_page
+
+        return run
+
+    return [
+        measure(f"{site}_listing", extract(True), job_count, repeat),
+        measure(f"{site}_listing_with_subpages", extract(False), job_count, repeat),
+    ]
+
+
+def bench_subpages(site: str, pages: int, jobs_per_page: int, repeat: int) -> Dict:
+    """Benchmark the parsing of the subpages of a site and their extractors"""
+    subpages = make_site_pages(site, pages, jobs_per_page)[1]
+    scraper = make_scraper(site, {})
+
+    def run() -> None:
+        for markup in subpages.values():
+            soup = scraper.make_soup(markup, scraper.subpage_parse_only)
+            assert scraper.extract_job_tech_stack_from_result(soup)
+            scraper.extract_company_name_from_subpage(soup)
+            scraper.extract_job_summary_from_subpage(soup)
+
+    return measure(f"{site}_subpage_extractors", run, len(subpages), repeat)
+
+
+def bench_load(rows: int, repeat: int) -> Dict:
+    """Benchmark the replacing load of a job table into a SQLite database"""
+    jobs = make_job_table(rows)
+    db_uri = main.DB_URI
+    with tempfile.TemporaryDirectory() as folder:
+        main.DB_URI = f"sqlite:///{os.path.join(folder, 'benchmark.db')}"
+        try:
+            return measure(
+                "load_data_to_db_sqlite",
+                lambda: main.load_data_to_db("prf", jobs, if_exists="replace"),
+                rows,
+                repeat,
+            )
+        finally:
+            main.DB_URI = db_uri
+
+
+def bench_analysis(rows: int, repeat: int) -> Dict:
+    """Benchmark the tech stack count of a synthetic job table"""
+    jobs = make_job_table(rows)
+    return measure(
+        f"analyze_tech_stack_{rows}", lambda: analyze_tech_stack(jobs), rows, repeat
+    )
+
+
+def run_benchmarks(
+    analysis_rows: List[int] = ANALYSIS_ROWS,
+    load_rows: int = LOAD_ROWS,
+    pages: int = PAGES,
+    jobs_per_page: int = JOBS_PER_PAGE,
+    repeat: int = REPEAT,
+) -> Dict:
+    """Run every benchmark and return the report of the run"""
+    results = []
+    with nof_url_env():
+        for site in SCRAPERS:
+            results.extend(bench_listing(site, pages, jobs_per_page, repeat))
+            results.append(bench_subpages(site, pages, jobs_per_page, repeat))
+    results.append(bench_load(load_rows, repeat))
+    for rows in analysis_rows:
+        results.append(bench_analysis(rows, repeat))
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare_reports(
+    report: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD
+) -> List[str]:
+    """Return the benchmarks slower than in the baseline by more than threshold"""
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        previous = baseline_results.get(result["name"])
+        if previous is None or previous["items"] != result["items"]:
+            continue
+        ratio = result["seconds"] / previous["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{result['name']}: {previous['seconds'] * 1000:.1f} ms -> "
+                f"{result['seconds'] * 1000:.1f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=ANALYSIS_ROWS,
+        help="sizes of the analyzed job tables",
+    )
+    parser.add_argument("--load-rows", type=int, default=LOAD_ROWS)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="small tables and a single run, for a smoke check",
+    )
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument(
+        "--compare", help="report the regressions against this JSON report"
+    )
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.rows, args.load_rows, args.repeat = [10_000], 1_000, 1
+
+    report = run_benchmarks(args.rows, args.load_rows, repeat=args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare_reports(
+                report, json.load(baseline_file), args.threshold
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
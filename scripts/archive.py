@@ -0,0 +1,136 @@
+import requests
+from typing import Callable, Dict, List, Optional
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+from retry import FetchError
+
+
+class ResponseArchive:
+    """Append-only archive of the raw responses of the crawls
+
+    Every response is a gzip member appended to the data file, so that it can
+    be read alone, and the index file lists the url, position and fetch time
+    of each one. The archive is written by a single process.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.clock = clock
+        # Index entries of every url, in fetch order
+        self.entries: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        with open(self.index_path, encoding="utf-8") as index_file:
+            for line in index_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Line cut by a crash while it was written
+                    continue
+                if entry["offset"] + entry["length"] <= size:
+                    self.entries.setdefault(entry["url"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def record(self, response: requests.Response, url: Optional[str] = None) -> None:
+        """Append the response to the archive"""
+        url = url or response.url
+        header = {
+            "url": url,
+            "status": response.status_code,
+            "encoding": response.encoding,
+            "content_type": response.headers.get("Content-Type"),
+            "fetched_at": self.clock(),
+        }
+        data = gzip.compress(
+            json.dumps(header).encode("utf-8") + b"\n" + response.content
+        )
+        with self._lock:
+            # The data is written before its index entry: a crash leaves at
+            # most an unindexed response behind
+            with open(self.path, "ab") as data_file:
+                offset = data_file.tell()
+                data_file.write(data)
+            entry = {
+                "url": url,
+                "offset": offset,
+                "length": len(data),
+                "status": response.status_code,
+                "fetched_at": header["fetched_at"],
+            }
+            with open(self.index_path, "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps(entry) + "\n")
+            self.entries.setdefault(url, []).append(entry)
+
+    def find(self, url: str, until: Optional[float] = None) -> Optional[Dict]:
+        """Return the index entry of the last response of the url fetched before
+        until, by default the last one"""
+        for entry in reversed(self.entries.get(url, ())):
+            if until is None or entry["fetched_at"] <= until:
+                return entry
+        return None
+
+    def load(self, entry: Dict) -> requests.Response:
+        """Read the response of an index entry"""
+        with open(self.path, "rb") as data_file:
+            data_file.seek(entry["offset"])
+            data = data_file.read(entry["length"])
+        header, body = gzip.decompress(data).split(b"\n", 1)
+        header = json.loads(header)
+        response = requests.Response()
+        response.status_code = header["status"]
+        response.url = header["url"]
+        response._content = body
+        response.encoding = header["encoding"]
+        if header["content_type"]:
+            response.headers["Content-Type"] = header["content_type"]
+        return response
+
+
+class ReplayTransport:
+    """Transport serving the responses of an archive, without network access
+
+    With until, the pages are served as they were fetched at that time.
+    """
+
+    def __init__(self, archive: ResponseArchive, until: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.archive = archive
+        self.until = until
+        self.request_count = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, cached: bool = False, **kwargs) -> requests.Response:
+        """Return the archived response of the url"""
+        entry = self.archive.find(url, self.until)
+        with self._lock:
+            self.request_count += 1
+            self.misses += entry is None
+        if entry is None:
+            raise FetchError(f"{url} is not in the archive")
+        return self.archive.load(entry)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.request_count, "misses": self.misses}
+
+    def log_stats(self) -> None:
+        self.logger.info(
+            f"Replayed requests: {self.request_count}, not archived: {self.misses}"
+        )
+
+    def close(self) -> None:
+        pass
@@ -1,20 +1,97 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Tuple, Iterable, Iterator
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import (
+    Callable,
+    List,
+    Dict,
+    Tuple,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Union,
+)
 from abc import ABC, abstractmethod
+from urllib.parse import urlparse
+import asyncio
 import pandas as pd
 import logging
 
-# Define common user agent headers
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-}
+from metrics import registry as metrics
+from profiling import profile_stage
+from records import JobRecord, records_to_frame
+from retry import RETRY_STATUS_CODES, FetchError
+from transport import Transport
+
+# Use the faster lxml parser when it is installed
+try:
+    import lxml  # noqa: F401
+
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+# Default number of simultaneous subpage requests to the same host in async fetch mode
+MAX_REQUESTS_PER_HOST = 4
 
 
 class Scraper(ABC):
-    def __init__(self, url: str):
+    # Parts of the pages needed by the scraper, None builds the whole tree
+    main_page_parse_only: Optional[SoupStrainer] = None
+    subpage_parse_only: Optional[SoupStrainer] = None
+    # Pagination of the main page and its page number links, None when the
+    # last page is not read from the markup
+    pagination_parse_only: Optional[SoupStrainer] = None
+    pagination_selector: Optional[str] = None
+
+    def __init__(
+        self,
+        url: str,
+        async_fetch: bool = False,
+        max_requests_per_host: int = MAX_REQUESTS_PER_HOST,
+        transport: Optional[Transport] = None,
+        known_links: Optional[Set[str]] = None,
+        parser: str = DEFAULT_PARSER,
+    ):
         self.logger = logging.getLogger(__name__)
         self.url = url
+        # The transport (and its connection pool) is shared when injected
+        self.transport = transport if transport is not None else Transport()
+        # In async fetch mode the subpages of a result page are downloaded
+        # concurrently before the job items are processed
+        self.async_fetch = async_fetch
+        self.max_requests_per_host = max_requests_per_host
+        self.prefetched_subpages: Dict[str, Union[requests.Response, Exception]] = {}
+        # Pages that could not be downloaded, kept for a targeted re-fetch
+        self.failed_urls: List[Dict[str, str]] = []
+        # The subpages of already stored jobs are not downloaded again
+        self.known_links = known_links if known_links is not None else set()
+        # BeautifulSoup tree builder: "lxml", "html.parser" or "html5lib"
+        self.parser = parser
+
+    def make_soup(
+        self,
+        markup: str,
+        parse_only: Optional[SoupStrainer] = None,
+        page: str = "main",
+    ) -> BeautifulSoup:
+        """Method to parse a page, building only the tree parts matched by parse_only"""
+        # html5lib does not support partial parsing
+        if self.parser == "html5lib":
+            parse_only = None
+        with metrics.timer(
+            "parse_seconds", scraper=type(self).__name__, page=page
+        ), profile_stage("parse"):
+            return BeautifulSoup(markup, self.parser, parse_only=parse_only)
+
+    def run_extractor(self, extractor: Callable, *args):
+        """Method to call an extractor of the scraper, timing it"""
+        with metrics.timer(
+            "extract_seconds",
+            scraper=type(self).__name__,
+            method=extractor.__name__,
+        ), profile_stage("parse"):
+            return extractor(*args)
 
     @abstractmethod
     def find_job_items(self, soup: BeautifulSoup) -> Iterable:
@@ -22,7 +99,12 @@ class Scraper(ABC):
         pass
 
     @abstractmethod
-    def get_job_info_data(self, item_iter: Iterator) -> Tuple[str, str, str, str, str]:
+    def get_job_link(self, item_iter: Iterator) -> Optional[str]:
+        """Abstract method to get the subpage link of a job item"""
+        pass
+
+    @abstractmethod
+    def get_job_info_data(self, item_iter: Iterator) -> JobRecord:
         """Abstract method to gather the data from a job item"""
         pass
 
@@ -41,44 +123,116 @@ class Scraper(ABC):
         # By default no company from the subpage
         return ""
 
-    def extract_job_info_from_result(self, soup: BeautifulSoup) -> List[dict]:
+    def find_last_page(self, markup: str) -> Optional[int]:
+        """Method to read the number of the last result page from the pagination"""
+        if self.pagination_selector is None:
+            return None
+        soup = self.make_soup(markup, self.pagination_parse_only, "pagination")
+        page_numbers = [
+            int(text)
+            for link in soup.select(self.pagination_selector)
+            if (text := link.get_text(strip=True)).isdigit()
+        ]
+        return max(page_numbers, default=None)
+
+    def record_failure(self, url: str, kind: str, error: Exception) -> None:
+        """Method to remember a page that could not be downloaded"""
+        self.logger.warning(f"Failed to retrieve {url}: {error}")
+        self.failed_urls.append(
+            {"kind": kind, "url": url, "page_url": self.url, "error": str(error)}
+        )
+
+    def extract_job_info_from_result(self, soup: BeautifulSoup) -> List[JobRecord]:
         """Method to extract job information from the soup"""
-        job_info: List[Dict] = []
+        return list(self.iter_job_info(soup))
+
+    def iter_job_info(self, soup: BeautifulSoup) -> Iterator[JobRecord]:
+        """Method to yield the job information of the soup one job at a time"""
         self.logger.info("Start list creation: search soup")
-        job_items = self.find_job_items(soup)
+        job_items = self.run_extractor(self.find_job_items, soup)
+
+        if self.async_fetch:
+            job_items = list(job_items)
+            job_links = [self.get_job_link(item) for item in job_items]
+            self.prefetched_subpages = self.fetch_subpages(
+                link for link in job_links if link and link not in self.known_links
+            )
 
         for item in job_items:
             self.logger.debug("Processing item: %s", item)
-            job_title, company_name, job_summary, job_link, job_tech_stack = [None] * 5
-            (
-                job_title,
-                company_name,
-                job_summary,
-                job_link,
-                job_tech_stack,
-            ) = self.get_job_info_data(item)
-
-            job_info.append(
-                {
-                    "job_title": job_title,
-                    "company_name": company_name,
-                    "job_summary": job_summary,
-                    "job_link": job_link,
-                    "job_tech_stack": job_tech_stack,
-                }
-            )
+            try:
+                record = self.get_job_info_data(item)
+            except FetchError as e:
+                # Leave the job out instead of storing it without its subpage
+                # data, so that it is scraped again on the next run
+                self.record_failure(self.get_job_link(item), "subpage", e)
+                continue
+
+            metrics.increment("extracted_jobs", scraper=type(self).__name__)
+            yield record
+        self.prefetched_subpages = {}
         self.logger.info("job_info collected")
-        return job_info
+
+    def fetch_subpages(
+        self, urls: Iterable[str]
+    ) -> Dict[str, Union[requests.Response, Exception]]:
+        """Method to download the subpages concurrently, limiting the requests
+        per host"""
+        return asyncio.run(self._fetch_subpages_async(list(dict.fromkeys(urls))))
+
+    async def _fetch_subpages_async(
+        self, urls: List[str]
+    ) -> Dict[str, Union[requests.Response, Exception]]:
+        """Fetch the urls in worker threads, one semaphore per host"""
+        host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(url: str) -> Tuple[str, Union[requests.Response, Exception]]:
+            host = urlparse(url).netloc
+            if host not in host_semaphores:
+                host_semaphores[host] = asyncio.Semaphore(self.max_requests_per_host)
+            async with host_semaphores[host]:
+                try:
+                    page = await asyncio.to_thread(self.transport.get, url, cached=True)
+                except requests.RequestException as e:
+                    # The transport already retried: the error is raised
+                    # in scrape_subpage instead of requesting the page again
+                    page = e
+            return url, page
+
+        results = await asyncio.gather(*(fetch(url) for url in urls))
+        self.logger.info(f"Prefetched {len(results)} subpages")
+        return dict(results)
 
     def scrape_subpage(self, url: str) -> Tuple[str, str, List[str]]:
         """Method to scrape the subpage to get the company name, summary, and tech stack"""
-        page = requests.get(url, headers=headers)
+        if url in self.known_links:
+            # Keep the stored subpage data of the job
+            self.logger.debug(f"Skipping known job subpage {url}")
+            return None, None, None
+        page = self.prefetched_subpages.pop(url, None)
+        if isinstance(page, FetchError):
+            raise page
+        if isinstance(page, Exception):
+            raise FetchError(f"Failed to fetch {url}: {page}") from page
+        if page is None:
+            page = self.transport.get(url, cached=True)
         if page.status_code == 200:
-            soup = BeautifulSoup(page.text, "html.parser")
-            tech_stack_list = self.extract_job_tech_stack_from_result(soup)
-            company_name = self.extract_company_name_from_subpage(soup)
-            job_summary = self.extract_job_summary_from_subpage(soup)
+            soup = self.make_soup(page.text, self.subpage_parse_only, "subpage")
+            tech_stack_list = self.run_extractor(
+                self.extract_job_tech_stack_from_result, soup
+            )
+            company_name = self.run_extractor(
+                self.extract_company_name_from_subpage, soup
+            )
+            job_summary = self.run_extractor(
+                self.extract_job_summary_from_subpage, soup
+            )
             return company_name, job_summary, tech_stack_list
+        elif page.status_code in RETRY_STATUS_CODES:
+            # The transport gave up on a transient error: fetch it again later
+            raise FetchError(
+                f"Failed to retrieve the page. Status code: {page.status_code}"
+            )
         else:
             self.logger.warning(
                 f"Failed to retrieve the page. Status code: {page.status_code}"
@@ -87,14 +241,38 @@ class Scraper(ABC):
 
     def scrape_main_page(self) -> pd.DataFrame:
         """Method to scrape the main page"""
-        page = requests.get(self.url, headers=headers)
+        return records_to_frame(list(self.iter_main_page()))
+
+    def fetch_main_page(self) -> requests.Response:
+        """Method to download the main page"""
+        return self.transport.get(self.url)
+
+    def iter_main_page(
+        self, page: Optional[requests.Response] = None
+    ) -> Iterator[JobRecord]:
+        """Method to scrape the main page, yielding the jobs one at a time
+
+        An already downloaded (e.g. prefetched) main page can be given as page.
+        """
+        if page is None:
+            try:
+                page = self.fetch_main_page()
+            except requests.RequestException as e:
+                self.record_failure(self.url, "main", e)
+                return
         if page.status_code == 200:
-            soup = BeautifulSoup(page.text, "html.parser")
-            job_info = self.extract_job_info_from_result(soup)
+            soup = self.make_soup(page.text, self.main_page_parse_only)
             self.logger.info("Successful soup creation")
-            return pd.DataFrame(job_info)
+            yield from self.iter_job_info(soup)
+        elif page.status_code in RETRY_STATUS_CODES:
+            self.record_failure(
+                self.url,
+                "main",
+                FetchError(
+                    f"Failed to retrieve the page. Status code: {page.status_code}"
+                ),
+            )
         else:
             self.logger.warning(
                 f"Failed to retrieve the page. Status code: {page.status_code}"
             )
-            return pd.DataFrame()
@@ -0,0 +1,268 @@
+import argparse
+import logging
+import sys
+from datetime import date, datetime
+from typing import List, Optional
+
+# Only the standard library is imported here: every command imports the
+# modules it needs, so that e.g. scraping does not load the plotting libraries
+
+SITES = ["prf", "nof"]
+# Options of scrape not supported by the resumable crawl of --workers
+SERIAL_SCRAPE_OPTIONS = ["batch", "record", "refetch_failed", "sequential"]
+# Stages of profiling.STAGES, repeated to keep this module free of imports
+PROFILE_STAGES = ["scrape", "parse", "load", "analyze"]
+LOG_FILE = "output.log"
+
+
+def setup_logging(filename: str = LOG_FILE, level: str = "INFO") -> None:
+    """Configure the logging of a run, writing a new log file"""
+    logging.basicConfig(level=level, filename=filename, filemode="w", encoding="utf-8")
+
+
+def scrape(args: argparse.Namespace) -> None:
+    """Scrape the websites and store the job data"""
+    from config import batch_search_kws
+    from main import (
+        create_transport,
+        crawl_with_queue,
+        get_and_store_all_job_data,
+        refetch_failed_urls,
+    )
+
+    if args.workers is not None:
+        # The worker processes create their own transports
+        stored = crawl_with_queue(args.sites, worker_count=args.workers)
+        print(f"{stored} jobs stored")
+        return
+    # One pooled session for the whole run
+    transport = create_transport(record=args.record or None)
+    try:
+        if args.refetch_failed:
+            for prefix in args.sites:
+                refetch_failed_urls(prefix, transport)
+        else:
+            get_and_store_all_job_data(
+                args.sites,
+                transport,
+                parallel=not args.sequential,
+                queries=batch_search_kws if args.batch else None,
+            )
+        transport.log_stats()
+    finally:
+        transport.close()
+
+
+def load(args: argparse.Namespace) -> None:
+    """Load the csv files of an earlier scrape to the database"""
+    from main import load_csv_to_db, load_dataset_to_db
+    from config import search_kws
+
+    load_to_db = load_csv_to_db if args.source == "csv" else load_dataset_to_db
+    for prefix in args.sites:
+        row_count = load_to_db(
+            prefix, None if args.batch else search_kws, incremental=not args.replace
+        )
+        print(f"{prefix}: {row_count} rows loaded")
+
+
+def analyze(args: argparse.Namespace) -> None:
+    """Print the most frequent technologies of the stored jobs"""
+    from analyze_data import get_tech_stack_counts
+
+    tech_stack_counts = get_tech_stack_counts(args.source)
+    if args.csv:
+        tech_stack_counts.to_csv(args.csv)
+    print(tech_stack_counts.head(args.top).to_string())
+
+
+def plot(args: argparse.Namespace) -> None:
+    """Plot the most frequent technologies, to a file or in a window"""
+    from analyze_data import analyze_data_from_db
+
+    analyze_data_from_db(args.output)
+
+
+def reextract(args: argparse.Namespace) -> None:
+    """Extract the job data again from the archived pages, without network access"""
+    from main import ARCHIVE_FILE, REEXTRACT_WORKERS, reextract_archive
+
+    until = None
+    if args.until is not None:
+        # End of the given day
+        until = datetime.combine(args.until, datetime.max.time()).timestamp()
+    for prefix in args.sites:
+        row_count = reextract_archive(
+            prefix,
+            args.archive or ARCHIVE_FILE,
+            workers=args.workers if args.workers is not None else REEXTRACT_WORKERS,
+            until=until,
+        )
+        print(f"{prefix}: {row_count} jobs updated")
+
+
+def trend(args: argparse.Namespace) -> None:
+    """Print and plot the daily counts of the technologies"""
+    from trends import analyze_trend_from_db
+
+    trend_counts = analyze_trend_from_db(
+        args.techs, args.since, args.output, args.query
+    )
+    print(trend_counts.tail(args.days).to_string())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the parser of the command line, one subcommand per stage"""
+    parser = argparse.ArgumentParser(
+        prog="job_scraping", description="Scrape job postings and analyze them"
+    )
+    parser.add_argument("--log-file", default=LOG_FILE)
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument(
+        "--metrics",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="write the run metrics to this file, as Prometheus text for a .prom "
+        "file and as a JSON report otherwise; can be repeated",
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        default=[],
+        choices=PROFILE_STAGES,
+        metavar="STAGE",
+        help="profile this stage of the pipeline (scrape, parse, load or analyze); "
+        "can be repeated",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=["cpu", "memory", "both"],
+        default="cpu",
+        help="profile with cProfile, tracemalloc or both",
+    )
+    parser.add_argument(
+        "--profile-dir", help="folder of the profile files, default: profiles"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape_parser = subparsers.add_parser("scrape", help=scrape.__doc__)
+    scrape_parser.add_argument("--sites", nargs="+", choices=SITES, default=SITES)
+    scrape_parser.add_argument(
+        "--batch", action="store_true", help="crawl all the batch_search_kws queries"
+    )
+    scrape_parser.add_argument(
+        "--refetch-failed",
+        action="store_true",
+        help="only fetch again the pages listed in the failed urls file",
+    )
+    scrape_parser.add_argument(
+        "--sequential", action="store_true", help="scrape one site at a time"
+    )
+    scrape_parser.add_argument(
+        "--record",
+        action="store_true",
+        help="append the raw responses to the archive for a later reextract",
+    )
+    scrape_parser.add_argument(
+        "--workers",
+        type=int,
+        help="crawl with this many processes sharing a resumable task queue, "
+        "not with --batch, --record, --refetch-failed or --sequential",
+    )
+    scrape_parser.set_defaults(handler=scrape)
+
+    load_parser = subparsers.add_parser("load", help=load.__doc__)
+    load_parser.add_argument("--sites", nargs="+", choices=SITES, default=SITES)
+    load_parser.add_argument(
+        "--batch", action="store_true", help="load the csv files of the batch crawl"
+    )
+    load_parser.add_argument(
+        "--replace", action="store_true", help="replace the tables instead of upserting"
+    )
+    load_parser.add_argument(
+        "--source",
+        choices=["dataset", "csv"],
+        default="dataset",
+        help="load the last scrape of the Parquet dataset or the csv files",
+    )
+    load_parser.set_defaults(handler=load)
+
+    analyze_parser = subparsers.add_parser("analyze", help=analyze.__doc__)
+    analyze_parser.add_argument("--top", type=int, default=15)
+    analyze_parser.add_argument("--csv", help="also write all the counts to this file")
+    analyze_parser.add_argument(
+        "--source",
+        choices=["db", "dataset"],
+        help="analyze the database tables or the Parquet dataset",
+    )
+    analyze_parser.set_defaults(handler=analyze)
+
+    plot_parser = subparsers.add_parser("plot", help=plot.__doc__)
+    plot_parser.add_argument(
+        "--output", help="save the chart to this image file instead of showing it"
+    )
+    plot_parser.set_defaults(handler=plot)
+
+    reextract_parser = subparsers.add_parser("reextract", help=reextract.__doc__)
+    reextract_parser.add_argument("--sites", nargs="+", choices=SITES, default=SITES)
+    reextract_parser.add_argument("--archive", help="archive file of scrape --record")
+    reextract_parser.add_argument(
+        "--workers", type=int, help="number of processes, default: one per CPU"
+    )
+    reextract_parser.add_argument(
+        "--until",
+        type=date.fromisoformat,
+        help="use the pages as they were on this day, e.g. 2024-01-31",
+    )
+    reextract_parser.set_defaults(handler=reextract)
+
+    trend_parser = subparsers.add_parser("trend", help=trend.__doc__)
+    trend_parser.add_argument("--techs", nargs="+", help="e.g. SPARK PYTHON")
+    trend_parser.add_argument(
+        "--since", type=date.fromisoformat, help="first day, e.g. 2024-01-31"
+    )
+    trend_parser.add_argument("--query", help="e.g. 'python developer'")
+    trend_parser.add_argument("--days", type=int, default=30, help="days printed")
+    trend_parser.add_argument(
+        "--output", help="save the chart to this image file instead of showing it"
+    )
+    trend_parser.set_defaults(handler=trend)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "scrape" and args.workers is not None:
+        options = [
+            "--" + option.replace("_", "-")
+            for option in SERIAL_SCRAPE_OPTIONS
+            if getattr(args, option)
+        ]
+        if options:
+            parser.error(f"--workers cannot be combined with {', '.join(options)}")
+    setup_logging(args.log_file, args.log_level)
+    if args.profile:
+        from profiling import configure
+
+        configure(args.profile, args.profile_mode, args.profile_dir)
+    try:
+        args.handler(args)
+    finally:
+        if args.profile:
+            from profiling import write_profiles
+
+            for path in write_profiles():
+                print(f"Profile written to {path}")
+        if args.metrics:
+            from metrics import registry
+
+            # Also written for a failed run, to see where it stopped
+            for path in args.metrics:
+                registry.write_report(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
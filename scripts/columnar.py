@@ -0,0 +1,233 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import date
+from typing import Iterator, List, Optional, Sequence
+import glob
+import logging
+import os
+import uuid
+
+from records import JobRecord
+
+# Parquet dataset of the scraped jobs, partitioned by scrape date and site:
+# <DATASET_FOLDER>/scrape_date=2024-01-31/site=prf/<query>-<run>.parquet
+DATASET_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "generated_parquet_files"
+)
+# Job rows read into memory at once when the dataset is streamed
+READ_BATCH_SIZE = 10000
+
+# Columns of the job files, the same in every file so that they can be read
+# as one table. The tech stack is a list of strings instead of a JSON array.
+JOB_SCHEMA = pa.schema(
+    [
+        ("query", pa.string()),
+        ("job_title", pa.string()),
+        ("company_name", pa.string()),
+        ("job_summary", pa.string()),
+        ("job_link", pa.string()),
+        ("job_tech_stack", pa.list_(pa.string())),
+        ("duplicate_of", pa.string()),
+        ("matched_queries", pa.string()),
+    ]
+)
+# Columns repeating few distinct values, stored and read as dictionaries. The
+# summaries and links are unique per job and are stored plain.
+DICTIONARY_COLUMNS = ["query", "company_name", "job_tech_stack.list.element"]
+# Columns only set by the batch crawl and the deduplication
+OPTIONAL_COLUMNS = ["duplicate_of", "matched_queries"]
+PARTITIONING = ds.partitioning(
+    pa.schema([("scrape_date", pa.date32()), ("site", pa.string())]), flavor="hive"
+)
+COMPRESSION = "zstd"
+
+logger = logging.getLogger(__name__)
+
+
+def get_partition_folder(
+    folder: str, site: str, scrape_date: Optional[date] = None
+) -> str:
+    """Return the folder of the job files of a site scraped on the given day"""
+    scrape_date = scrape_date or date.today()
+    return os.path.join(
+        folder, f"scrape_date={scrape_date.isoformat()}", f"site={site}"
+    )
+
+
+def records_to_table(df: pd.DataFrame, query: str) -> pa.Table:
+    """Convert the job DataFrame to a table of the job schema"""
+    df = df.reindex(columns=JOB_SCHEMA.names).assign(query=query)
+    # Missing columns and values become nulls
+    df = df.astype(object).where(df.notna(), None)
+    return pa.Table.from_pandas(df, schema=JOB_SCHEMA, preserve_index=False)
+
+
+def records_to_arrow(records: Sequence[JobRecord], query: str) -> pa.Table:
+    """Build the table of the records column by column, without a DataFrame"""
+    columns = {
+        column: [getattr(record, column) for record in records]
+        for column in JOB_SCHEMA.names
+        if column != "query"
+    }
+    columns["query"] = [query] * len(records)
+    return pa.Table.from_pydict(columns, schema=JOB_SCHEMA)
+
+
+class ParquetSink:
+    """Writer of the jobs of one site and query to a file of the dataset
+
+    The batches of a run are written as row groups of a single file. Unless
+    append is set, the file replaces the files of the same query written
+    earlier on the same day.
+    """
+
+    def __init__(
+        self,
+        site: str,
+        query: str,
+        folder: str = DATASET_FOLDER,
+        append: bool = False,
+        scrape_date: Optional[date] = None,
+    ):
+        self.query = query
+        self.folder = get_partition_folder(folder, site, scrape_date)
+        self.file_prefix = query.replace(" ", "_")
+        self.path = os.path.join(
+            self.folder, f"{self.file_prefix}-{uuid.uuid4().hex}.parquet"
+        )
+        self.append = append
+        self.writer: Optional[pq.ParquetWriter] = None
+
+    def __enter__(self) -> "ParquetSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Write the jobs of the DataFrame as a row group"""
+        self._write_table(records_to_table(df, self.query))
+
+    def write_records(self, records: Sequence[JobRecord]) -> None:
+        """Write the job records as a row group"""
+        self._write_table(records_to_arrow(records, self.query))
+
+    def _write_table(self, table: pa.Table) -> None:
+        if self.writer is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self.writer = pq.ParquetWriter(
+                self.path,
+                JOB_SCHEMA,
+                use_dictionary=DICTIONARY_COLUMNS,
+                compression=COMPRESSION,
+            )
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        if not self.append:
+            # The file of this run replaces the earlier ones of the day
+            pattern = os.path.join(self.folder, f"{glob.escape(self.file_prefix)}-*")
+            for path in glob.glob(pattern):
+                if path != self.path:
+                    os.remove(path)
+        logger.info(f"Data loaded into {self.path}.")
+
+
+def build_filters(
+    sites: Optional[List[str]] = None,
+    queries: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Optional[List[tuple]]:
+    """Return the row filters of the dataset, the partition ones skip whole folders"""
+    filters = []
+    if sites is not None:
+        filters.append(("site", "in", sites))
+    if queries is not None:
+        filters.append(("query", "in", queries))
+    if start_date is not None:
+        filters.append(("scrape_date", ">=", start_date))
+    if end_date is not None:
+        filters.append(("scrape_date", "<=", end_date))
+    return filters or None
+
+
+def open_dataset(
+    folder: str = DATASET_FOLDER,
+    sites: Optional[List[str]] = None,
+    queries: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pq.ParquetDataset:
+    """Open the job files of the dataset matching the filters, memory mapped"""
+    return pq.ParquetDataset(
+        folder,
+        filters=build_filters(sites, queries, start_date, end_date),
+        partitioning=PARTITIONING,
+        read_dictionary=DICTIONARY_COLUMNS,
+        memory_map=True,
+    )
+
+
+def read_jobs(
+    columns: Optional[List[str]] = None,
+    folder: str = DATASET_FOLDER,
+    sites: Optional[List[str]] = None,
+    queries: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """Read the given columns of the jobs, with the scrape_date and site columns
+
+    Only the requested columns are read from the files. The dictionary
+    columns become categoricals.
+    """
+    if not os.path.isdir(folder):
+        return pd.DataFrame(columns=columns or JOB_SCHEMA.names)
+    dataset = open_dataset(folder, sites, queries, start_date, end_date)
+    return dataset.read(columns=columns).to_pandas()
+
+
+def latest_scrape_date(
+    folder: str = DATASET_FOLDER,
+    site: Optional[str] = None,
+    query: Optional[str] = None,
+) -> Optional[date]:
+    """Return the last day the jobs of the site and query were scraped"""
+    dates = read_jobs(
+        ["scrape_date"],
+        folder,
+        [site] if site is not None else None,
+        [query] if query is not None else None,
+    )["scrape_date"]
+    return dates.max() if len(dates) else None
+
+
+def iter_dataset_records(
+    site: str,
+    query: str,
+    folder: str = DATASET_FOLDER,
+    scrape_date: Optional[date] = None,
+    batch_size: int = READ_BATCH_SIZE,
+) -> Iterator[JobRecord]:
+    """Yield the job records of a site and query scraped on a day, by default
+    the last one, reading the files in batches"""
+    scrape_date = scrape_date or latest_scrape_date(folder, site, query)
+    if scrape_date is None:
+        return
+    dataset = ds.dataset(
+        get_partition_folder(folder, site, scrape_date), schema=JOB_SCHEMA
+    )
+    scanner = dataset.scanner(filter=ds.field("query") == query, batch_size=batch_size)
+    for batch in scanner.to_batches():
+        for record in batch.to_pylist():
+            for column in OPTIONAL_COLUMNS:
+                if record[column] is None:
+                    del record[column]
+            yield JobRecord.from_dict(record)
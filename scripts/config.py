@@ -1,2 +1,9 @@
 # Set the search keywords (2 words required)
 search_kws = ("Data", "engineer")
+
+# Keyword queries crawled together in batch mode (2 words each), the postings
+# matched by several queries are scraped only once
+batch_search_kws = [
+    search_kws,
+    ("Python", "developer"),
+]
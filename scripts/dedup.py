@@ -0,0 +1,270 @@
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import logging
+import re
+import threading
+import zlib
+
+from records import JobRecord, frame_to_records
+
+# Number of hash functions of a MinHash signature, split into BANDS bands
+# of NUM_PERM // BANDS rows for the locality-sensitive hashing
+NUM_PERM = 64
+BANDS = 16
+# Postings whose estimated Jaccard similarity reaches this are duplicates
+SIMILARITY_THRESHOLD = 0.7
+# Number of words of a job summary shingle
+SHINGLE_SIZE = 3
+# Seed of the hash functions, fixed so that signatures are stable between runs
+SEED = 42
+
+# Prime of the universal hash functions, below 2**32 so that signatures fit uint32
+PRIME = np.uint64(4294967291)
+WORD_RE = re.compile(r"\w+")
+
+logger = logging.getLogger(__name__)
+
+
+def posting_tokens(record: JobRecord) -> Set[str]:
+    """Return the features of a posting: title and company words, summary
+    shingles and technologies"""
+    tokens: Set[str] = set()
+
+    def words(value) -> List[str]:
+        return WORD_RE.findall(value.lower()) if isinstance(value, str) else []
+
+    tokens.update(f"title:{word}" for word in words(record.job_title))
+    tokens.update(f"company:{word}" for word in words(record.company_name))
+    summary = words(record.job_summary)
+    tokens.update(
+        "summary:" + " ".join(summary[num : num + SHINGLE_SIZE])
+        for num in range(max(len(summary) - SHINGLE_SIZE + 1, 0))
+    )
+    techs = record.job_tech_stack
+    if isinstance(techs, (list, tuple, np.ndarray)):
+        tokens.update(f"tech:{tech.strip().lower()}" for tech in techs if tech)
+    return tokens
+
+
+class MinHasher:
+    """MinHash signatures from NUM_PERM universal hash functions (a * x + b) mod p"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = SEED):
+        rng = np.random.default_rng(seed)
+        # Signatures of other hashers are not comparable, e.g. the stored ones
+        self.name = f"minhash-{num_perm}-{seed}"
+        # a * x + b stays below 2**64 for the 32-bit token hashes x
+        self.a = rng.integers(1, int(PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, int(PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, tokens: Iterable[str]) -> Optional[np.ndarray]:
+        """Return the signature of the tokens, None when there is no token"""
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return None
+        return ((self.a * hashes + self.b) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two postings from their signatures"""
+    return float(np.mean(signature == other))
+
+
+class LshIndex:
+    """Banded locality-sensitive hashing index of MinHash signatures
+
+    Postings agreeing on all the rows of at least one band are candidates.
+    Bulk loaded signatures are kept in sorted numpy arrays per band, searched
+    with binary search, the ones added one by one in a dict per band.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = SEED):
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Random odd multipliers combining the rows of a band into one key
+        rng = np.random.default_rng(seed + 1)
+        self.mix = rng.integers(0, 2**63, size=self.rows, dtype=np.uint64) * 2 + 1
+        self.sorted_keys = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self.sorted_ids = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Return the (postings, bands) keys of a (postings, num_perm) array of
+        signatures"""
+        bands = signatures[:, : self.bands * self.rows].astype(np.uint64)
+        bands = bands.reshape(len(signatures), self.bands, self.rows)
+        return (bands * self.mix).sum(axis=2)
+
+    def build(self, ids: np.ndarray, signatures: np.ndarray) -> None:
+        """Bulk load the signatures, replacing the previously built ones"""
+        keys = self.band_keys(signatures)
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind="stable")
+            self.sorted_keys[band] = keys[order, band]
+            self.sorted_ids[band] = ids[order]
+
+    def add(self, posting_id: int, signature: np.ndarray) -> None:
+        keys = self.band_keys(signature[np.newaxis])[0]
+        for band, key in enumerate(keys.tolist()):
+            self.buckets[band].setdefault(key, []).append(posting_id)
+
+    def candidates(self, signature: np.ndarray) -> Set[int]:
+        """Return the ids of the postings sharing a band with the signature"""
+        keys = self.band_keys(signature[np.newaxis])[0]
+        found: Set[int] = set()
+        for band, key in enumerate(keys.tolist()):
+            sorted_keys = self.sorted_keys[band]
+            start = int(np.searchsorted(sorted_keys, np.uint64(key), side="left"))
+            end = int(np.searchsorted(sorted_keys, np.uint64(key), side="right"))
+            found.update(self.sorted_ids[band][start:end].tolist())
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+
+def encode_signatures(signatures: np.ndarray) -> List[str]:
+    """Return the signatures as hex strings, e.g. to store them in a text column"""
+    return [signature.tobytes().hex() for signature in signatures]
+
+
+def decode_signatures(hex_signatures: Iterable[str], num_perm: int) -> np.ndarray:
+    """Return the (postings, num_perm) array of the hex encoded signatures"""
+    data = bytes.fromhex("".join(hex_signatures))
+    return np.frombuffer(data, dtype=np.uint32).reshape(-1, num_perm)
+
+
+class DuplicateFilter:
+    """Streaming near-duplicate detection of the scraped postings
+
+    Each posting is compared with the postings seen before it, including the
+    stored ones loaded with load. It is shared by the site scrapers running in
+    parallel threads: of two near-duplicate postings found in the same run,
+    the one added first is canonical, so with parallel sites duplicate_of
+    depends on the timing of the threads. Scrape the sites one after the
+    other for reproducible duplicate_of values.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        hasher: Optional[MinHasher] = None,
+        bands: int = BANDS,
+    ):
+        self.threshold = threshold
+        self.hasher = hasher if hasher is not None else MinHasher()
+        self.index = LshIndex(self.hasher.num_perm, bands)
+        # Canonical link and signature of every indexed posting, by id
+        self.canonical_links: List[str] = []
+        self.loaded_signatures = np.empty((0, self.hasher.num_perm), np.uint32)
+        self.added_signatures: List[np.ndarray] = []
+        # Signatures computed since the last take_unsaved_signatures, by link
+        self.unsaved_signatures: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.canonical_links)
+
+    def load(
+        self, df: pd.DataFrame, signatures: Optional[Dict[str, np.ndarray]] = None
+    ) -> None:
+        """Index the stored postings, before any posting is added
+
+        The postings with a saved signature in signatures are not hashed again,
+        only their job_link and duplicate_of columns are used.
+        """
+        signatures = signatures or {}
+        links = df["job_link"].tolist()
+        duplicate_links = (
+            df["duplicate_of"].tolist()
+            if "duplicate_of" in df.columns
+            else [None] * len(links)
+        )
+        unsaved_signatures: Dict[str, np.ndarray] = {}
+        missing = [link not in signatures for link in links]
+        if any(missing):
+            for record in frame_to_records(df[missing]):
+                signature = self.hasher.signature(posting_tokens(record))
+                if signature is not None:
+                    unsaved_signatures[record.job_link] = signature
+
+        canonical_links, loaded_signatures = [], []
+        for link, duplicate_link in zip(links, duplicate_links):
+            signature = signatures.get(link)
+            if signature is None:
+                signature = unsaved_signatures.get(link)
+                if signature is None:
+                    continue
+            # Missing values are read as NaN
+            canonical_links.append(
+                duplicate_link if isinstance(duplicate_link, str) else link
+            )
+            loaded_signatures.append(signature)
+        with self._lock:
+            self.canonical_links = canonical_links
+            self.loaded_signatures = (
+                np.vstack(loaded_signatures)
+                if loaded_signatures
+                else np.empty((0, self.hasher.num_perm), np.uint32)
+            )
+            self.added_signatures = []
+            self.unsaved_signatures = unsaved_signatures
+            self.index.build(np.arange(len(canonical_links)), self.loaded_signatures)
+        logger.info(
+            f"{len(canonical_links)} stored postings indexed for deduplication, "
+            f"{len(unsaved_signatures)} of them hashed"
+        )
+
+    def take_unsaved_signatures(self) -> Dict[str, np.ndarray]:
+        """Return the signatures computed since the last call, by job link"""
+        with self._lock:
+            unsaved_signatures, self.unsaved_signatures = self.unsaved_signatures, {}
+        return unsaved_signatures
+
+    def _signature(self, posting_id: int) -> np.ndarray:
+        if posting_id < len(self.loaded_signatures):
+            return self.loaded_signatures[posting_id]
+        return self.added_signatures[posting_id - len(self.loaded_signatures)]
+
+    def add(self, record: JobRecord) -> Optional[str]:
+        """Index the posting, returning the canonical link of its earlier duplicate"""
+        signature = self.hasher.signature(posting_tokens(record))
+        if signature is None:
+            return None
+        with self._lock:
+            best_id, best_similarity = None, self.threshold
+            # The first indexed posting wins a tie
+            for posting_id in sorted(self.index.candidates(signature)):
+                score = similarity(signature, self._signature(posting_id))
+                if score > best_similarity or (
+                    best_id is None and score == best_similarity
+                ):
+                    best_id, best_similarity = posting_id, score
+            canonical = self.canonical_links[best_id] if best_id is not None else None
+            if canonical == record.job_link:
+                # The posting itself, e.g. an earlier result page repeated
+                canonical = None
+            self.index.add(len(self.canonical_links), signature)
+            self.canonical_links.append(canonical or record.job_link)
+            self.added_signatures.append(signature)
+            self.unsaved_signatures[record.job_link] = signature
+        return canonical
+
+    def mark_duplicates(self, records: Iterable[JobRecord]) -> Iterator[JobRecord]:
+        """Yield the records with the canonical link of their duplicate, if any
+
+        The records of known jobs (without subpage data) were checked when
+        they were first stored and are passed through.
+        """
+        duplicate_count = 0
+        for record in records:
+            if record.job_tech_stack is not None:
+                record = replace(
+                    record, duplicate_of=self.add(record), deduplicated=True
+                )
+                duplicate_count += record.duplicate_of is not None
+            yield record
+        logger.info(f"{duplicate_count} near-duplicate postings found")
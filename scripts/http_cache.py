@@ -0,0 +1,162 @@
+import requests
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+# Entries younger than this are served without contacting the server (seconds)
+MAX_AGE = 24 * 60 * 60
+# Entries older than this are evicted instead of revalidated (seconds)
+MAX_STALE_AGE = 30 * 24 * 60 * 60
+# Total size of the stored bodies before the oldest entries are evicted (bytes)
+MAX_SIZE = 500 * 1024 * 1024
+
+
+class ResponseCache:
+    """Persistent on-disk cache of successful GET responses, keyed by URL"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_age: float = MAX_AGE,
+        max_stale_age: float = MAX_STALE_AGE,
+        max_size: int = MAX_SIZE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.max_age = max_age
+        self.max_stale_age = max_stale_age
+        self.max_size = max_size
+        self.clock = clock
+        self.total_size = 0
+        # The transport threads share the running total and the eviction
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.evict()
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        """Return the body and metadata file paths of a URL"""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.body", f"{base}.json"
+
+    def load(self, url: str) -> Optional[Tuple[Dict, bytes]]:
+        """Return the metadata and body stored for the URL, if any"""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, body
+
+    def is_fresh(self, meta: Dict) -> bool:
+        """Check whether the entry can be served without revalidation"""
+        return self.clock() - meta["stored_at"] < self.max_age
+
+    def conditional_headers(self, meta: Dict) -> Dict[str, str]:
+        """Return the validator headers for revalidating the entry"""
+        validators: Dict[str, str] = {}
+        if meta.get("etag"):
+            validators["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            validators["If-Modified-Since"] = meta["last_modified"]
+        return validators
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """Store the body and validators of a successful response"""
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "stored_at": self.clock(),
+            "encoding": response.encoding,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        self._write(body_path, response.content)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+        with self._lock:
+            # The running total is only an estimate, evict() recounts the files
+            self.total_size += len(response.content)
+            if self.total_size > self.max_size:
+                self.evict()
+
+    def touch(
+        self, url: str, meta: Dict, response: Optional[requests.Response] = None
+    ) -> None:
+        """Mark a revalidated entry as fresh again, with the new validators
+        of the 304 response, if any"""
+        meta["stored_at"] = self.clock()
+        if response is not None:
+            if response.headers.get("ETag"):
+                meta["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                meta["last_modified"] = response.headers["Last-Modified"]
+        self._write(self._paths(url)[1], json.dumps(meta).encode("utf-8"))
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Write the file atomically so that readers never see partial entries"""
+        # A temporary file per call, as several threads may write the same entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+
+    def evict(self) -> None:
+        """Remove the too old entries, then the oldest ones above the size limit"""
+        entries: List[Tuple[float, int, str]] = []
+        now = self.clock()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.directory, name)
+            body_path = f"{meta_path[:-5]}.body"
+            try:
+                with open(meta_path, encoding="utf-8") as meta_file:
+                    stored_at = json.load(meta_file)["stored_at"]
+                size = os.path.getsize(body_path)
+            except (OSError, ValueError, KeyError):
+                self._remove(meta_path, body_path)
+                continue
+            if now - stored_at > self.max_stale_age:
+                self._remove(meta_path, body_path)
+            else:
+                entries.append((stored_at, size, meta_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, meta_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(meta_path, f"{meta_path[:-5]}.body")
+            total_size -= size
+        self.total_size = total_size
+
+    def _remove(self, *paths: str) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def cached_response(url: str, meta: Dict, body: bytes) -> requests.Response:
+    """Build a response object from a cache entry"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = meta.get("encoding")
+    return response
@@ -0,0 +1,194 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+import json
+import threading
+import time
+
+# Prefix of the metric names in the Prometheus export
+NAMESPACE = "job_scraping"
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Count of the observed values per bucket, with their sum"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket and one for the values above the last bound
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Return the number of values up to each bound, as Prometheus buckets"""
+        counts, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            total += count
+            counts.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return counts
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms of a run, by name and labels
+
+    The registry is shared by the threads of the run. Worker processes have
+    their own registry.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.started_at = clock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict[str, object]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add the value to a counter"""
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set the current value of a gauge"""
+        with self._lock:
+            self.gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Add a value, e.g. a duration in seconds, to a histogram"""
+        key = self._labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the duration of the block in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        """Forget every metric, e.g. at the start of a run"""
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started_at = self.clock()
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self.counters.get(name, {}).get(self._labels(labels), 0)
+
+    def to_dict(self) -> Dict:
+        """Return the run report: every series with its labels and values"""
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": self.clock() - self.started_at,
+                "counters": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for name, series in sorted(self.counters.items())
+                    for key, value in series.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for name, series in sorted(self.gauges.items())
+                    for key, value in series.items()
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(key),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "mean": histogram.sum / histogram.count,
+                        "buckets": dict(histogram.cumulative_counts()),
+                    }
+                    for name, series in sorted(self.histograms.items())
+                    for key, histogram in series.items()
+                ],
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                metric = f"{NAMESPACE}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{format_labels(key)} {value}")
+            for name, series in sorted(self.gauges.items()):
+                metric = f"{NAMESPACE}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                for key, value in series.items():
+                    lines.append(f"{metric}{format_labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                metric = f"{NAMESPACE}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative_counts():
+                        bucket_labels = format_labels(key + (("le", bound),))
+                        lines.append(f"{metric}_bucket{bucket_labels} {count}")
+                    lines.append(f"{metric}_sum{format_labels(key)} {histogram.sum}")
+                    lines.append(
+                        f"{metric}_count{format_labels(key)} {histogram.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str) -> None:
+        """Write the metrics to a file, in the Prometheus format for a .prom file
+        and as a JSON run report otherwise"""
+        content = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        with open(path, "w", encoding="utf-8") as report_file:
+            report_file.write(content)
+
+
+def format_labels(labels: Labels) -> str:
+    """Format the labels of a Prometheus sample, escaping their values"""
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Metrics of the current run
+registry = MetricsRegistry()
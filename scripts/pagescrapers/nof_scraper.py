@@ -1,27 +1,49 @@
-from bs4 import BeautifulSoup
-from typing import List, Tuple, Iterable, Iterator
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import List, Iterable, Iterator, Optional
 import os
 
 from base_scraper import Scraper
+from records import JobRecord
 
 
 class NofScraper(Scraper):
-    def __init__(self, url: str):
-        super().__init__(url)
+    # Only the job links are parsed on the main page. The subpage is parsed
+    # whole: the summary is the sibling of its heading, and a strainer would
+    # make every kept tag a sibling of the others.
+    main_page_parse_only = SoupStrainer("a", class_="posting-list-item")
+    # The page links of the listing's pagination bar
+    pagination_parse_only = SoupStrainer("ul", class_="pagination")
+    pagination_selector = "ul.pagination a.page-link"
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(url, **kwargs)
 
     def find_job_items(self, soup: BeautifulSoup) -> Iterable:
         """Method to find the job items"""
         return soup.find_all("a", class_="posting-list-item")
 
-    def get_job_info_data(self, item_iter: Iterator) -> Tuple[str, str, str, str, str]:
-        """Method to gather the data for a job item"""
-        job_title = item_iter.find("h3", class_="posting-title__position").text.strip()
-        # Define base url based on envrinment variable: slice the first 23 characters
-        nof_url_base = os.getenv("NOF_URL")[:23]
+    def get_job_link(self, item_iter: Iterator) -> Optional[str]:
+        """Method to get the subpage link of a job item"""
         if item_iter.has_attr("href"):
-            job_link = f'{nof_url_base}{item_iter["href"]}'
-            company_name, job_summary, job_tech_stack = self.scrape_subpage(job_link)
-        return job_title, company_name, job_summary, job_link, job_tech_stack
+            # Define base url based on envrinment variable: slice the first 23
+            # characters
+            nof_url_base = os.getenv("NOF_URL")[:23]
+            return f'{nof_url_base}{item_iter["href"]}'
+        return None
+
+    def get_job_info_data(self, item_iter: Iterator) -> JobRecord:
+        """Method to gather the data for a job item"""
+        record = JobRecord(
+            job_title=item_iter.find(
+                "h3", class_="posting-title__position"
+            ).text.strip(),
+            job_link=self.get_job_link(item_iter),
+        )
+        if record.job_link:
+            record.company_name, record.job_summary, record.job_tech_stack = (
+                self.scrape_subpage(record.job_link)
+            )
+        return record
 
     def extract_job_tech_stack_from_result(self, soup: BeautifulSoup) -> List[str]:
         """Method to extract job tech stack from the soup"""
@@ -1,32 +1,43 @@
-from bs4 import BeautifulSoup
-from typing import List, Tuple, Iterable, Iterator
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import List, Iterable, Iterator, Optional
 
 from base_scraper import Scraper
+from records import JobRecord
 
 
 class PrfScraper(Scraper):
-    def __init__(self, url: str):
-        super().__init__(url)
+    # Only the job card list is parsed on the main page. The subpage is parsed
+    # whole: the tech stack is found through the parent of the technologies image.
+    main_page_parse_only = SoupStrainer("ul", class_="job-cards")
+    # The page links of the listing's pagination bar
+    pagination_parse_only = SoupStrainer("ul", class_="pagination")
+    pagination_selector = "ul.pagination a"
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(url, **kwargs)
 
     def find_job_items(self, soup: BeautifulSoup) -> Iterable:
         """Method to find the job items"""
         return soup.select("ul.job-cards > li")
 
-    def get_job_info_data(self, item_iter: Iterator) -> Tuple[str, str, str, str, str]:
-        """Method to gather the data for a job item"""
+    def get_job_link(self, item_iter: Iterator) -> Optional[str]:
+        """Method to get the subpage link of a job item"""
+        if item_iter.has_attr("data-link"):
+            return str(item_iter["data-link"])
+        return None
 
+    def get_job_info_data(self, item_iter: Iterator) -> JobRecord:
+        """Method to gather the data for a job item"""
+        record = JobRecord(job_link=self.get_job_link(item_iter))
         if item_iter.has_attr("data-prof-name"):
-            job_title = str(item_iter["data-prof-name"])
-        if item_iter.has_attr("data-item-brand"):
-            company_name = str(item_iter["data-item-brand"])
+            record.job_title = str(item_iter["data-prof-name"])
         if item_iter.has_attr("data-item-brand"):
-            job_summary = str(item_iter["data-item-brand"])
-        if item_iter.has_attr("data-link"):
-            job_link = str(item_iter["data-link"])
-            job_tech_stack = self.scrape_subpage(job_link)[2]
+            record.company_name = str(item_iter["data-item-brand"])
+        if record.job_link:
+            record.job_tech_stack = self.scrape_subpage(record.job_link)[2]
 
-        job_summary = item_iter.find("div", class_="job-card__text").text.strip()
-        return job_title, company_name, job_summary, job_link, job_tech_stack
+        record.job_summary = item_iter.find("div", class_="job-card__text").text.strip()
+        return record
 
     def extract_job_tech_stack_from_result(self, soup: BeautifulSoup) -> List[str]:
         """Method to extract job tech stack from the soup"""
@@ -0,0 +1,215 @@
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional
+import cProfile
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# Pipeline stages that can be profiled
+STAGES = ["scrape", "parse", "load", "analyze"]
+# Profiled stages, none by default, e.g. JOB_PROFILE=scrape,load
+PROFILE_STAGES = {stage for stage in os.getenv("JOB_PROFILE", "").split(",") if stage}
+# "cpu" for cProfile, "memory" for tracemalloc, or "both"
+PROFILE_MODE = os.getenv("JOB_PROFILE_MODE", "cpu")
+PROFILE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), "profiles")
+# Frames kept for each traced allocation
+TRACEMALLOC_FRAMES = 10
+# Functions and allocation sites listed in the text summaries
+SUMMARY_SIZE = 30
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_local = threading.local()
+# CPU profilers of each stage, one per thread: a profiler is not thread-safe
+_cpu_profilers: Dict[str, List[cProfile.Profile]] = {}
+# Peak traced memory of each stage, with the allocations at the end of the
+# call reaching it
+_memory_peaks: Dict[str, Dict] = {}
+# Peak traced memory of each running traced call, before the last reset
+_running_peaks: List[List[int]] = []
+
+
+def configure(
+    stages: Iterable[str], mode: str = "cpu", folder: Optional[str] = None
+) -> None:
+    """Choose the profiled stages, the kind of profiling and the output folder"""
+    global PROFILE_STAGES, PROFILE_MODE, PROFILE_FOLDER
+    stages = set(stages)
+    unknown = stages - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+    if mode not in ("cpu", "memory", "both"):
+        raise ValueError(f"Unknown profiling mode: {mode}")
+    PROFILE_STAGES = stages
+    PROFILE_MODE = mode
+    PROFILE_FOLDER = folder or PROFILE_FOLDER
+
+
+def profile_stage(stage: str) -> ContextManager[None]:
+    """Profile the block as a part of the stage, if the stage is profiled
+
+    The calls of a stage add up to one profile. The CPU time of a stage
+    nested in another profiled one only counts in the nested stage. A
+    stage that is not profiled costs a set lookup.
+    """
+    if stage not in PROFILE_STAGES:
+        return nullcontext()
+    return _profile(stage)
+
+
+@contextmanager
+def _profile(stage: str) -> Iterator[None]:
+    cpu = PROFILE_MODE in ("cpu", "both")
+    memory = PROFILE_MODE in ("memory", "both")
+    if cpu:
+        cpu = _enable_profiler(stage)
+    if memory:
+        running_peak = _start_tracing()
+    try:
+        yield
+    finally:
+        if memory:
+            _stop_tracing(stage, running_peak)
+        if cpu:
+            _disable_profiler()
+
+
+def _enable_profiler(stage: str) -> bool:
+    """Switch the profiling of the thread to the profiler of the stage"""
+    if not hasattr(_local, "profilers"):
+        _local.profilers = {}
+        _local.stack = []
+    profiler = _local.profilers.get(stage)
+    if profiler is None:
+        profiler = _local.profilers[stage] = cProfile.Profile()
+        with _lock:
+            _cpu_profilers.setdefault(stage, []).append(profiler)
+    if _local.stack:
+        _local.stack[-1].disable()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # From Python 3.12 only one profiler can run at a time in the process
+        logger.warning(f"The {stage} stage is not CPU profiled: {e}")
+        if _local.stack:
+            _local.stack[-1].enable()
+        return False
+    _local.stack.append(profiler)
+    return True
+
+
+def _disable_profiler() -> None:
+    _local.stack.pop().disable()
+    if _local.stack:
+        _local.stack[-1].enable()
+
+
+def _start_tracing() -> List[int]:
+    """Start tracing a call, and return its running peak
+
+    The peak of the traced memory is reset, so that the peak of an earlier
+    or an outer stage is not credited to this one. The peaks of the running
+    calls are kept up to date before.
+    """
+    with _lock:
+        if not _running_peaks:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        peak = tracemalloc.get_traced_memory()[1]
+        for running_peak in _running_peaks:
+            running_peak[0] = max(running_peak[0], peak)
+        running_peak = [0]
+        _running_peaks.append(running_peak)
+        tracemalloc.reset_peak()
+        return running_peak
+
+
+def _stop_tracing(stage: str, running_peak: List[int]) -> None:
+    """Keep the allocations of the stage if they peaked higher than in its
+    earlier calls
+
+    The peak of a stage nested in another traced one includes the memory
+    allocated by the outer stage before. The allocations kept are the ones
+    still traced at the end of the call, as tracemalloc cannot take a
+    snapshot at the peak.
+    """
+    with _lock:
+        _running_peaks.remove(running_peak)
+        peak = max(running_peak[0], tracemalloc.get_traced_memory()[1])
+        stage_peak = _memory_peaks.setdefault(
+            stage, {"calls": 0, "peak": 0, "snapshot": None}
+        )
+        stage_peak["calls"] += 1
+        if peak > stage_peak["peak"]:
+            stage_peak["peak"] = peak
+            stage_peak["snapshot"] = tracemalloc.take_snapshot()
+        if not _running_peaks:
+            tracemalloc.stop()
+
+
+def write_profiles(folder: Optional[str] = None) -> List[str]:
+    """Write the profiles of the stages and return the paths of the files
+
+    For each stage a .pstats file, readable with pstats, snakeviz or
+    flameprof (which also draws flame graphs from it), and a text summary of
+    the slowest functions. For the memory profiling a summary of the largest
+    allocation sites at the end of the call reaching the peak, and the
+    tracemalloc snapshot.
+    """
+    folder = folder or PROFILE_FOLDER
+    run = time.strftime("%Y%m%d-%H%M%S")
+    paths = []
+    with _lock:
+        cpu_profilers = {stage: list(items) for stage, items in _cpu_profilers.items()}
+        memory_peaks = dict(_memory_peaks)
+    if cpu_profilers or memory_peaks:
+        os.makedirs(folder, exist_ok=True)
+
+    for stage, profilers in cpu_profilers.items():
+        for profiler in profilers:
+            profiler.create_stats()
+        profilers = [profiler for profiler in profilers if profiler.stats]
+        if not profilers:
+            continue
+        stats = pstats.Stats(*profilers)
+        path = os.path.join(folder, f"{run}-{stage}.pstats")
+        stats.dump_stats(path)
+        summary_path = os.path.join(folder, f"{run}-{stage}-cpu.txt")
+        with open(summary_path, "w", encoding="utf-8") as summary_file:
+            stats.stream = summary_file
+            stats.sort_stats("cumulative").print_stats(SUMMARY_SIZE)
+        paths += [path, summary_path]
+
+    for stage, stage_peak in memory_peaks.items():
+        snapshot = stage_peak["snapshot"]
+        if snapshot is None:
+            continue
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        path = os.path.join(folder, f"{run}-{stage}.tracemalloc")
+        snapshot.dump(path)
+        summary_path = os.path.join(folder, f"{run}-{stage}-memory.txt")
+        with open(summary_path, "w", encoding="utf-8") as summary_file:
+            summary_file.write(
+                f"{stage}: {stage_peak['calls']} calls, peak traced memory "
+                f"{stage_peak['peak'] / 2**20:.1f} MiB\n"
+                f"Largest allocation sites at the end of the stage:\n"
+            )
+            for statistic in snapshot.statistics("lineno")[:SUMMARY_SIZE]:
+                summary_file.write(f"{statistic}\n")
+        paths += [path, summary_path]
+    for path in paths:
+        logger.info(f"Profile written to {path}")
+    return paths
+
+
+def reset() -> None:
+    """Forget the profiles collected so far"""
+    with _lock:
+        _cpu_profilers.clear()
+        _memory_peaks.clear()
+    _local.__dict__.clear()
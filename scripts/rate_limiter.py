@@ -0,0 +1,123 @@
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+import logging
+import threading
+import time
+
+# Requests per second allowed to one host at the start, and its limits
+INITIAL_RATE = 1.0
+MIN_RATE = 0.05
+MAX_RATE = 4.0
+# Number of requests that can be sent at once after an idle period
+BURST = 4
+# The rate is multiplied by this on a 429 or 503 response...
+BACKOFF_FACTOR = 0.5
+# ...and raised by RECOVERY_STEP after RECOVERY_THRESHOLD successful responses in a row
+RECOVERY_STEP = 0.25
+RECOVERY_THRESHOLD = 10
+# Status codes telling that the server is overloaded
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class HostBucket:
+    """Token bucket of one host"""
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = now
+        self.blocked_until = now
+        self.successes = 0
+
+
+class AdaptiveRateLimiter:
+    """Per-host token bucket limiter adapting its rate to the server's responses"""
+
+    def __init__(
+        self,
+        rate: float = INITIAL_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        burst: int = BURST,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets: Dict[str, HostBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str, now: float) -> HostBucket:
+        if host not in self.buckets:
+            self.buckets[host] = HostBucket(self.initial_rate, self.burst, now)
+        return self.buckets[host]
+
+    def acquire(self, url: str) -> float:
+        """Wait until a request to the host of the url is allowed, return the wait"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(host, now)
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate
+            )
+            bucket.updated = now
+            # Reserve a token: a negative balance is the wait of this request
+            bucket.tokens -= 1
+            wait = max(-bucket.tokens / bucket.rate, bucket.blocked_until - now, 0.0)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def record_response(
+        self, url: str, status_code: int, retry_after: Optional[str] = None
+    ) -> None:
+        """Slow down on throttling responses, speed up while the host is healthy"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(host, now)
+            if status_code in THROTTLE_STATUS_CODES:
+                bucket.successes = 0
+                bucket.rate = max(self.min_rate, bucket.rate * BACKOFF_FACTOR)
+                # No burst until the tokens refill at the lowered rate
+                bucket.tokens = min(bucket.tokens, 0.0)
+                delay = parse_retry_after(retry_after)
+                if delay is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, now + delay)
+                self.logger.warning(
+                    f"{host} answered {status_code}, rate lowered to "
+                    f"{bucket.rate:.2f}/s, retry after: {retry_after}"
+                )
+            elif status_code < 400:
+                bucket.successes += 1
+                if bucket.successes >= RECOVERY_THRESHOLD:
+                    bucket.successes = 0
+                    bucket.rate = min(self.max_rate, bucket.rate + RECOVERY_STEP)
+
+    def rate(self, url: str) -> float:
+        """Return the current rate of the host of the url"""
+        host = urlparse(url).netloc
+        with self._lock:
+            return self._bucket(host, self.clock()).rate
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds of a Retry-After header (seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    # HTTP dates are wall clock times, unlike the monotonic clock of the limiter
+    return max(retry_at - time.time(), 0.0)
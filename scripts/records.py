@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Mapping, Optional, Sequence, Union
+import pandas as pd
+
+# Fields of a job found by the scrapers, in the order of get_job_info_data
+JOB_COLUMNS = ["job_title", "company_name", "job_summary", "job_link", "job_tech_stack"]
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """Job posting flowing from the scrapers to the storage
+
+    The fields the scraper could not read stay None. Iterating over the
+    record gives the five scraped fields, so it unpacks as the tuple of
+    get_job_info_data did.
+    """
+
+    job_title: Optional[str] = None
+    company_name: Optional[str] = None
+    job_summary: Optional[str] = None
+    job_link: Optional[str] = None
+    # None for a known job whose subpage was not scraped
+    job_tech_stack: Optional[List[str]] = None
+    # Queries finding the job in a batch crawl, comma separated once stored
+    matched_queries: Optional[Union[List[str], str]] = None
+    # Link of the canonical posting of a near-duplicate
+    duplicate_of: Optional[str] = None
+    # Whether the posting went through the duplicate check: its duplicate_of
+    # column is stored then, even when it is None
+    deduplicated: bool = False
+
+    def __iter__(self) -> Iterator:
+        yield self.job_title
+        yield self.company_name
+        yield self.job_summary
+        yield self.job_link
+        yield self.job_tech_stack
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "JobRecord":
+        """Build the record of a job row, ignoring the columns of the tables
+        that are not job fields, e.g. first_seen"""
+        return cls(
+            data.get("job_title"),
+            data.get("company_name"),
+            data.get("job_summary"),
+            data.get("job_link"),
+            data.get("job_tech_stack"),
+            data.get("matched_queries"),
+            data.get("duplicate_of"),
+            "duplicate_of" in data,
+        )
+
+    def to_dict(self) -> dict:
+        """Return the job row of the record, without the unset optional columns"""
+        row = {column: getattr(self, column) for column in JOB_COLUMNS}
+        if self.matched_queries is not None:
+            row["matched_queries"] = self.matched_queries
+        if self.deduplicated or self.duplicate_of is not None:
+            row["duplicate_of"] = self.duplicate_of
+        return row
+
+
+def records_to_frame(records: Sequence[JobRecord]) -> pd.DataFrame:
+    """Build the DataFrame of the records column by column
+
+    The optional columns are only added when a record sets them.
+    """
+    columns = {
+        column: [getattr(record, column) for record in records]
+        for column in JOB_COLUMNS
+    }
+    if any(record.matched_queries is not None for record in records):
+        columns["matched_queries"] = [record.matched_queries for record in records]
+    if any(
+        record.deduplicated or record.duplicate_of is not None for record in records
+    ):
+        columns["duplicate_of"] = [record.duplicate_of for record in records]
+    return pd.DataFrame(columns)
+
+
+def frame_to_records(df: pd.DataFrame) -> List[JobRecord]:
+    """Return the records of the job rows of the DataFrame"""
+    return [JobRecord.from_dict(row) for row in df.to_dict("records")]
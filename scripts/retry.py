@@ -0,0 +1,121 @@
+import requests
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+import logging
+import random
+import threading
+import time
+
+# Number of tries of a request before it is recorded as failed
+MAX_ATTEMPTS = 4
+# Backoff before the n-th retry: random between 0 and min(MAX_DELAY, BASE_DELAY * 2**n)
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+# Status codes of transient server errors worth retrying
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Consecutive failures opening the circuit of a host, and seconds before a new try
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 120.0
+
+
+class FetchError(requests.RequestException):
+    """A page could not be downloaded"""
+
+
+class CircuitOpenError(FetchError):
+    """The host failed too often recently, the request was not sent"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter between the tries of a request"""
+
+    def __init__(
+        self,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_delay: float = BASE_DELAY,
+        max_delay: float = MAX_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.rng = rng if rng is not None else random.Random()
+
+    def delay(self, retry_num: int) -> float:
+        """Return the backoff before the retry_num-th retry (starting at 0)"""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2**retry_num))
+
+    def backoff(self, retry_num: int) -> None:
+        self.sleep(self.delay(retry_num))
+
+
+class HostCircuit:
+    """Failure count and state of one host"""
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker stopping the requests to a failing host
+
+    After failure_threshold consecutive failures the circuit opens and the
+    requests fail fast. Once reset_timeout has passed one trial request is
+    let through: a success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.circuits: Dict[str, HostCircuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, url: str) -> HostCircuit:
+        host = urlparse(url).netloc
+        if host not in self.circuits:
+            self.circuits[host] = HostCircuit()
+        return self.circuits[host]
+
+    def allow(self, url: str) -> bool:
+        """Check whether a request to the host of the url may be sent"""
+        with self._lock:
+            circuit = self._circuit(url)
+            if circuit.opened_at is None:
+                return True
+            if self.clock() - circuit.opened_at >= self.reset_timeout:
+                # Half-open: let one trial request through
+                circuit.opened_at = self.clock()
+                return True
+            return False
+
+    def record_success(self, url: str) -> None:
+        with self._lock:
+            circuit = self._circuit(url)
+            circuit.failures = 0
+            circuit.opened_at = None
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            circuit = self._circuit(url)
+            circuit.failures += 1
+            if circuit.failures >= self.failure_threshold:
+                if circuit.opened_at is None:
+                    self.logger.warning(
+                        f"Circuit opened for {urlparse(url).netloc} after "
+                        f"{circuit.failures} failures"
+                    )
+                circuit.opened_at = self.clock()
+
+    def is_open(self, url: str) -> bool:
+        with self._lock:
+            return self._circuit(url).opened_at is not None
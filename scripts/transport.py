@@ -0,0 +1,203 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+import threading
+import logging
+import time
+
+from archive import ResponseArchive
+from http_cache import ResponseCache, cached_response
+from metrics import registry as metrics
+from rate_limiter import AdaptiveRateLimiter
+from retry import (
+    RETRY_STATUS_CODES,
+    CircuitBreaker,
+    CircuitOpenError,
+    FetchError,
+    RetryPolicy,
+)
+
+# Define common user agent headers
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    # gzip and deflate, plus br when the brotli decoder is installed
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# Number of kept-alive connections per host
+POOL_SIZE = 10
+# Seconds to wait for the connection and between two bytes of the response
+TIMEOUT = (10, 30)
+
+
+class Transport:
+    """HTTP transport sharing one pooled keep-alive session between scrapers"""
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeout: Tuple[float, float] = TIMEOUT,
+        archive: Optional[ResponseArchive] = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.adapter = adapter
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        # Without a retry policy every request is sent once
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.timeout = timeout
+        # Every returned response is recorded for an offline re-extraction
+        self.archive = archive
+        self.request_count = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, url: str, cached: bool = False, **kwargs) -> requests.Response:
+        """Send a GET request through the pooled session
+
+        With cached=True a fresh cache entry is served without a request,
+        and a stale one is revalidated with a conditional GET.
+        """
+        response = self._get(url, cached, **kwargs)
+        if self.archive is not None:
+            self.archive.record(response, url)
+        return response
+
+    def _get(self, url: str, cached: bool = False, **kwargs) -> requests.Response:
+        if not cached or self.cache is None:
+            return self._send(url, **kwargs)
+
+        entry = self.cache.load(url)
+        if entry is not None and self.cache.is_fresh(entry[0]):
+            self._count("cache_hits")
+            metrics.increment("cache_hits", host=urlparse(url).netloc)
+            return cached_response(url, *entry)
+
+        request_headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            request_headers.update(self.cache.conditional_headers(entry[0]))
+        response = self._send(url, headers=request_headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            metrics.increment("cache_revalidations", host=urlparse(url).netloc)
+            self.cache.touch(url, entry[0], response)
+            return cached_response(url, *entry)
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        return response
+
+    def _send(self, url: str, **kwargs) -> requests.Response:
+        """Send the request, retrying connection errors, timeouts, bodies cut
+        short and 5xx responses
+
+        The last transient error response is returned when all the tries
+        fail, a FetchError is raised when no response was received at all.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        max_attempts = self.retry_policy.max_attempts if self.retry_policy else 1
+        response, error = None, None
+        for attempt in range(max_attempts):
+            if attempt > 0:
+                self._count("retries")
+                metrics.increment("retries", host=urlparse(url).netloc)
+                self.retry_policy.backoff(attempt - 1)
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow(url):
+                self._count("failures")
+                metrics.increment("fetch_failures", host=urlparse(url).netloc)
+                raise CircuitOpenError(f"Circuit open, not requesting {url}")
+            try:
+                response, error = self._send_once(url, **kwargs), None
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                response, error = None, e
+                self.logger.warning(f"Try {attempt + 1} of {url} failed: {e}")
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success(url)
+                return response
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure(url)
+        self._count("failures")
+        metrics.increment("fetch_failures", host=urlparse(url).netloc)
+        if response is not None:
+            return response
+        raise FetchError(f"Failed to fetch {url}: {error}") from error
+
+    def _send_once(self, url: str, **kwargs) -> requests.Response:
+        """Send the request once the rate limiter allows it"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        self._count("request_count")
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            metrics.observe(
+                "fetch_seconds", time.perf_counter() - start, host=host, status="error"
+            )
+            raise
+        metrics.observe(
+            "fetch_seconds",
+            time.perf_counter() - start,
+            host=host,
+            status=response.status_code,
+        )
+        # Size of the decoded body, the compressed size is not kept by requests
+        metrics.increment("downloaded_bytes", len(response.content), host=host)
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_response(
+                url, response.status_code, response.headers.get("Retry-After")
+            )
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of requests and of the connections opened for them"""
+        pools = self.adapter.poolmanager.pools
+        connections = sum(pools[key].num_connections for key in pools.keys())
+        return {
+            "requests": self.request_count,
+            "connections": connections,
+            "reused_connections": max(self.request_count - connections, 0),
+            "cache_hits": self.cache_hits,
+            "revalidated": self.revalidated,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+    def log_stats(self) -> None:
+        """Log the connection reuse statistics of the run"""
+        stats = self.stats()
+        self.logger.info(
+            f"HTTP requests: {stats['requests']}, connections opened: "
+            f"{stats['connections']}, reused: {stats['reused_connections']}, "
+            f"cache hits: {stats['cache_hits']}, revalidated: {stats['revalidated']}, "
+            f"retries: {stats['retries']}, failures: {stats['failures']}"
+        )
+
+    def close(self) -> None:
+        """Close the session and its pooled connections"""
+        self.session.close()
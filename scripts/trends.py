@@ -0,0 +1,268 @@
+import pandas as pd
+from collections import Counter
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+import json
+import logging
+
+from analyze_data import build_alias_map, visualize_tech_trend
+from config import search_kws
+from records import JobRecord
+from storage import DB_URI, StorageBackend, get_backend
+
+# Postings of every crawl: one row per day, site, query and job link, with the
+# technologies the posting adds to the counts of the query
+SNAPSHOT_TABLE = "job_snapshots"
+# Number of postings asking for each technology, per day, site and query
+TREND_TABLE = "tech_trend"
+
+logger = logging.getLogger(__name__)
+
+
+def count_techs(record: JobRecord, query: str) -> List[str]:
+    """Return the technologies the posting adds to the counts of the query
+
+    As in the analysis, only the postings with all the words of the query in
+    their title count, the near-duplicates do not, and the technologies are
+    upper cased with their variations replaced by their category.
+    """
+    techs = record.job_tech_stack
+    title = str(record.job_title or "").lower()
+    if (
+        techs is None
+        or isinstance(record.duplicate_of, str)
+        or not all(word in title for word in query.split())
+    ):
+        return []
+    techs = [tech for tech in techs if tech]
+    alias_map = build_alias_map(techs)
+    return [alias_map[tech] for tech in techs]
+
+
+def read_snapshot(
+    backend: StorageBackend, site: str, query: str, before: date
+) -> Optional[str]:
+    """Return the day of the last snapshot of the site and query before a day"""
+    if not backend.has_table(SNAPSHOT_TABLE):
+        return None
+    day = backend.read_query(
+        f"SELECT MAX(snapshot_date) AS day FROM {SNAPSHOT_TABLE} "
+        "WHERE site = :site AND query = :query AND snapshot_date < :day",
+        {"site": site, "query": query, "day": before.isoformat()},
+    )["day"][0]
+    return day if isinstance(day, str) else None
+
+
+def update_snapshot(
+    backend: StorageBackend,
+    site: str,
+    query: str,
+    postings: Dict[str, Optional[List[str]]],
+    snapshot_date: Optional[date] = None,
+    lookup: Optional[Callable[[List[str]], Dict[str, JobRecord]]] = None,
+    kept_links: Optional[Iterable[str]] = (),
+) -> None:
+    """Store the postings of a crawl as the snapshot of the day, and update the
+    tech counts of the day from the postings added and removed since the last
+    snapshot
+
+    postings maps the job links to their counted technologies, None for the
+    jobs whose subpage was not scraped: these keep the technologies of the last
+    snapshot or are looked up with lookup. The postings of the last snapshot in
+    kept_links, e.g. of failed subpages, are kept as they were, and all of them
+    are with kept_links=None, for an incomplete crawl.
+    """
+    snapshot_date = snapshot_date or date.today()
+    keys = {"site": site, "query": query}
+    previous: Dict[str, List[str]] = {}
+    counts: Counter = Counter()
+    previous_day = read_snapshot(backend, site, query, snapshot_date)
+    if previous_day is not None:
+        params = {**keys, "day": previous_day}
+        rows = backend.read_query(
+            f"SELECT job_link, techs FROM {SNAPSHOT_TABLE} WHERE site = :site "
+            "AND query = :query AND snapshot_date = :day",
+            params,
+        )
+        previous = dict(zip(rows["job_link"], rows["techs"].map(json.loads)))
+        rows = backend.read_query(
+            f"SELECT tech, count FROM {TREND_TABLE} WHERE site = :site "
+            "AND query = :query AND snapshot_date = :day",
+            params,
+        )
+        counts.update(dict(zip(rows["tech"], rows["count"].astype(int))))
+    # The technologies gone before the last snapshot have a zero row already
+    previous_techs = {tech for tech, count in counts.items() if count > 0}
+
+    kept = previous if kept_links is None else kept_links
+    current = {link: previous[link] for link in kept if link in previous}
+    unknown = [
+        link
+        for link, techs in postings.items()
+        if techs is None and link not in previous
+    ]
+    stored_jobs = lookup(unknown) if unknown and lookup is not None else {}
+    for link, techs in postings.items():
+        if techs is None:
+            techs = previous.get(link) or count_techs(
+                stored_jobs.get(link) or JobRecord(), query
+            )
+        current[link] = techs
+
+    # Only the changed postings are counted
+    added = removed = 0
+    for link, techs in previous.items():
+        if current.get(link) != techs:
+            counts.subtract(techs)
+            removed += link not in current
+    for link, techs in current.items():
+        if previous.get(link) != techs:
+            counts.update(techs)
+            added += link not in previous
+    logger.info(
+        f"{site} {query} snapshot: {len(current)} postings, {added} added, "
+        f"{removed} removed since {previous_day}"
+    )
+
+    day = snapshot_date.isoformat()
+    snapshot = pd.DataFrame(
+        {
+            "snapshot_date": day,
+            "site": site,
+            "query": query,
+            "job_link": list(current),
+            "techs": [json.dumps(techs) for techs in current.values()],
+        },
+        columns=["snapshot_date", "site", "query", "job_link", "techs"],
+    )
+    # A technology no longer asked for gets a zero count on the day it is gone
+    trend = pd.DataFrame(
+        [
+            (day, site, query, tech, max(count, 0))
+            for tech, count in counts.items()
+            if count > 0 or tech in previous_techs
+        ],
+        columns=["snapshot_date", "site", "query", "tech", "count"],
+    )
+    day_keys = {**keys, "snapshot_date": day}
+    backend.replace_rows(SNAPSHOT_TABLE, snapshot, day_keys)
+    backend.replace_rows(TREND_TABLE, trend, day_keys)
+    with backend.engine.begin() as conn:
+        for table_name in (SNAPSHOT_TABLE, TREND_TABLE):
+            conn.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS {table_name}_day_idx "
+                f"ON {table_name} (site, query, snapshot_date)"
+            )
+
+
+class SnapshotRecorder:
+    """Collector of the postings a crawl of a site finds for each query, stored
+    as the snapshot of the day once the crawl is over"""
+
+    def __init__(
+        self, site: str, queries: List[str], snapshot_date: Optional[date] = None
+    ):
+        self.site = site
+        self.queries = queries
+        self.snapshot_date = snapshot_date or date.today()
+        # Counted technologies of the postings by job link, for each query
+        self.postings: Dict[str, Dict[str, Optional[List[str]]]] = {
+            query: {} for query in queries
+        }
+
+    def add(self, record: JobRecord) -> None:
+        matched_queries = record.matched_queries
+        queries = matched_queries.split(",") if matched_queries else self.queries
+        for query in queries:
+            # None for the known jobs, whose subpage was not scraped
+            self.postings.setdefault(query, {})[record.job_link] = (
+                count_techs(record, query)
+                if record.job_tech_stack is not None
+                else None
+            )
+
+    def track(self, records: Iterable[JobRecord]) -> Iterator[JobRecord]:
+        """Yield the records, adding each one to the snapshot"""
+        for record in records:
+            self.add(record)
+            yield record
+
+    def save(
+        self,
+        backend: StorageBackend,
+        lookup: Optional[Callable[[List[str]], Dict[str, JobRecord]]] = None,
+        kept_links: Optional[Dict[str, Optional[Set[str]]]] = None,
+    ) -> None:
+        """Store the snapshot of every query, kept_links listing by query the
+        postings to keep from the last snapshot"""
+        for query, postings in self.postings.items():
+            update_snapshot(
+                backend,
+                self.site,
+                query,
+                postings,
+                self.snapshot_date,
+                lookup,
+                (kept_links or {}).get(query, ()),
+            )
+
+
+def read_tech_trend(
+    backend: StorageBackend,
+    query: str,
+    techs: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """Return the daily counts of the technologies for the query, one column per
+    technology, summed over the sites
+
+    A site not crawled on a day counts with its last snapshot.
+    """
+    conditions = ["query = :query"]
+    params: Dict[str, object] = {"query": query}
+    if techs:
+        tech_params = {f"tech_{num}": tech.upper() for num, tech in enumerate(techs)}
+        conditions.append(f"tech IN ({', '.join(':' + key for key in tech_params)})")
+        params.update(tech_params)
+    if start_date is not None:
+        conditions.append("snapshot_date >= :start_date")
+        params["start_date"] = start_date.isoformat()
+    if end_date is not None:
+        conditions.append("snapshot_date <= :end_date")
+        params["end_date"] = end_date.isoformat()
+    if not backend.has_table(TREND_TABLE):
+        return pd.DataFrame()
+    counts = backend.read_query(
+        f"SELECT snapshot_date, site, tech, count FROM {TREND_TABLE} "
+        f"WHERE {' AND '.join(conditions)}",
+        params,
+    )
+    if counts.empty:
+        return pd.DataFrame()
+    counts["snapshot_date"] = pd.to_datetime(counts["snapshot_date"])
+    trend = counts.pivot_table(
+        index="snapshot_date", columns=["site", "tech"], values="count", aggfunc="sum"
+    )
+    trend = trend.ffill().fillna(0).T.groupby(level="tech").sum().T.astype(int)
+    trend.columns.name = "tech"
+    return trend
+
+
+def analyze_trend_from_db(
+    techs: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    output_path: Optional[str] = None,
+    query: Optional[str] = None,
+) -> pd.DataFrame:
+    """Plot the daily counts of the technologies for the search keywords
+
+    Without techs the most frequent technologies of the last day are plotted.
+    """
+    query = query or " ".join(search_kws).lower()
+    trend = read_tech_trend(get_backend(DB_URI), query, techs, start_date)
+    if trend.empty:
+        logger.warning(f"No snapshot of the {query} jobs yet")
+        return trend
+    visualize_tech_trend(trend, f"{query.title()}'s Tech Stack Trend", output_path)
+    return trend
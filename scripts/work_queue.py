@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+import json
+import logging
+import sqlite3
+import time
+
+# Number of tries of a task before it is left in the failed state
+MAX_TASK_ATTEMPTS = 3
+# Seconds a connection waits for the lock of the queue held by another process
+BUSY_TIMEOUT = 30
+
+# Task states
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    result TEXT,
+    stored INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    UNIQUE (kind, prefix, url)
+);
+CREATE INDEX IF NOT EXISTS tasks_state_idx ON tasks (state, id);
+"""
+
+
+class Task(NamedTuple):
+    id: int
+    kind: str
+    prefix: str
+    url: str
+    payload: Optional[dict]
+
+
+class WorkQueue:
+    """Durable queue of crawl tasks in a SQLite file, shared by worker processes
+
+    Every task is a (kind, prefix, url) triple added once. The workers claim
+    the pending tasks one at a time, and the results of the done tasks stay in
+    the queue until they are stored, so that a crashed crawl can be resumed.
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        # Autocommit: every statement is its own transaction
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run the statements of the block atomically"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def add(
+        self, kind: str, prefix: str, url: str, payload: Optional[dict] = None
+    ) -> bool:
+        """Add a pending task, return False when the task is already queued"""
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO tasks (kind, prefix, url, payload, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (kind, prefix, url, json.dumps(payload), time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def claim(self, worker: str) -> Optional[Task]:
+        """Mark the oldest pending task as in progress by the worker and return it"""
+        # A single UPDATE is atomic: two workers never claim the same task
+        row = self.conn.execute(
+            "UPDATE tasks SET state = ?, worker = ?, attempts = attempts + 1, "
+            "updated_at = ? WHERE id = (SELECT id FROM tasks WHERE state = ? "
+            "ORDER BY id LIMIT 1) RETURNING id, kind, prefix, url, payload",
+            (IN_PROGRESS, worker, time.time(), PENDING),
+        ).fetchone()
+        if row is None:
+            return None
+        return Task(*row[:4], json.loads(row[4]))
+
+    def complete(self, task: Task, result: Optional[dict] = None) -> None:
+        """Mark the task as done, keeping its result until it is stored"""
+        self.conn.execute(
+            "UPDATE tasks SET state = ?, result = ?, error = NULL, updated_at = ? "
+            "WHERE id = ?",
+            (
+                DONE,
+                json.dumps(result) if result is not None else None,
+                time.time(),
+                task.id,
+            ),
+        )
+
+    def fail(
+        self, task: Task, error: str, max_attempts: int = MAX_TASK_ATTEMPTS
+    ) -> None:
+        """Put the task back in the queue, or leave it failed after max_attempts"""
+        self.conn.execute(
+            "UPDATE tasks SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, "
+            "error = ?, updated_at = ? WHERE id = ?",
+            (max_attempts, PENDING, FAILED, error, time.time(), task.id),
+        )
+
+    def reset_in_progress(self) -> int:
+        """Put back the tasks left in progress by the workers of a crashed run"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET state = ?, worker = NULL WHERE state = ?",
+            (PENDING, IN_PROGRESS),
+        )
+        if cursor.rowcount:
+            self.logger.info(f"{cursor.rowcount} interrupted tasks queued again")
+        return cursor.rowcount
+
+    def unstored_results(self, limit: int) -> List[Tuple[int, str, dict]]:
+        """Return the (id, prefix, result) of the oldest done tasks not stored yet"""
+        rows = self.conn.execute(
+            "SELECT id, prefix, result FROM tasks WHERE state = ? AND stored = 0 "
+            "AND result IS NOT NULL ORDER BY id LIMIT ?",
+            (DONE, limit),
+        ).fetchall()
+        return [
+            (task_id, prefix, json.loads(result)) for task_id, prefix, result in rows
+        ]
+
+    def mark_stored(self, task_ids: List[int]) -> None:
+        """Mark the results of the tasks as stored in the database"""
+        self.conn.executemany(
+            "UPDATE tasks SET stored = 1 WHERE id = ?",
+            [(task_id,) for task_id in task_ids],
+        )
+
+    def stored_results(self) -> Iterator[Tuple[str, dict]]:
+        """Yield the (prefix, result) of the done tasks already stored"""
+        rows = self.conn.execute(
+            "SELECT prefix, result FROM tasks WHERE stored = 1 "
+            "AND result IS NOT NULL ORDER BY id"
+        )
+        for prefix, result in rows:
+            yield prefix, json.loads(result)
+
+    def stored_prefixes(self) -> Set[str]:
+        """Return the prefixes with stored results, e.g. by an interrupted crawl"""
+        rows = self.conn.execute("SELECT DISTINCT prefix FROM tasks WHERE stored = 1")
+        return {prefix for prefix, in rows.fetchall()}
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of tasks in each state"""
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state")
+        return dict(rows.fetchall())
+
+    def is_finished(self) -> bool:
+        """Check whether no task is pending or in progress"""
+        counts = self.counts()
+        return not counts.get(PENDING) and not counts.get(IN_PROGRESS)
+
+    def failed_tasks(self) -> List[Task]:
+        """Return the tasks left failed after their last try"""
+        rows = self.conn.execute(
+            "SELECT id, kind, prefix, url, payload FROM tasks WHERE state = ?",
+            (FAILED,),
+        ).fetchall()
+        return [Task(*row[:4], json.loads(row[4])) for row in rows]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,81 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import pytest
+
+
+class StubServer:
+    """Local HTTP server answering from a path -> (status, headers, body) table"""
+
+    def __init__(self):
+        self.routes: Dict[str, Tuple[int, Dict[str, str], bytes]] = {}
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        # Status codes answered to a path before its route, one per request
+        self.failures: Dict[str, List[int]] = {}
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def add_page(self, path: str, body: str, status: int = 200, headers=None):
+        self.routes[path] = (status, headers or {}, body.encode("utf-8"))
+
+    def add_failures(self, path: str, *statuses: int):
+        self.failures.setdefault(path, []).extend(statuses)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((self.path, dict(self.headers)))
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.delay)
+                status, headers, body = server.routes.get(
+                    self.path, (404, {}, b"not found")
+                )
+                with server._lock:
+                    if server.failures.get(self.path):
+                        status = server.failures[self.path].pop(0)
+                        headers, body = {}, b"error"
+                etag = headers.get("ETag")
+                if etag and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
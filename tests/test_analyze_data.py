@@ -1,13 +1,30 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
 import pytest
 from config import search_kws
 from unittest.mock import patch
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
 from scripts.analyze_data import (
     fetch_data_from_db,
     preprocess_tech_stack,
     analyze_tech_stack,
     filter_jobs_by_title,
+    fetch_tech_counts_from_db,
+    visualize_tech_stack,
+    fetch_data_from_dataset,
 )
+from scripts.columnar import ParquetSink
+from datetime import date
+from scripts.storage import get_backend
 
 
 # Define fixtures to provide the common data
@@ -57,7 +74,7 @@ def test_fetch_data_from_db(
         "company_name": str,
         "job_summary": str,
         "job_link": str,
-        "job_tech_stack": str,
+        "job_tech_stack": list,
     }
 
     # Check each column type and name in the dataframe
@@ -135,11 +152,117 @@ def test_analyze_tech_stack(
         {"PYTHON": 2, "SQL": 1, "JAVA": 1, "ANGOL": 1}
     )
 
-    assert tech_stack == expected_tech_stack
+    assert list(tech_stack) == expected_tech_stack
     pd.testing.assert_series_equal(
         tech_stack_counts, expected_tech_stack_counts, check_names=False
     )
 
 
+def test_analyze_tech_stack_matches_row_by_row_counting():
+    rng = np.random.default_rng(0)
+    techs = ["Python", "python", "SQL", "Spark", "Angol (B2)", "ANGOL C1", "Git"]
+    titles = [
+        f"{search_kws[0]} {search_kws[1]}",
+        f"senior {search_kws[1].upper()} ({search_kws[0].lower()})",
+        "Java developer",
+        None,
+    ]
+    dataframe = pd.DataFrame(
+        {
+            "job_title": rng.choice(titles, 300),
+            "job_tech_stack": [
+                list(rng.choice(techs, rng.integers(0, 5))) for _ in range(300)
+            ],
+        }
+    )
+
+    tech_stack, tech_stack_counts = analyze_tech_stack(dataframe)
+
+    # Reference: row by row filtering, flattening and counting
+    expected_tech_stack = []
+    for title, tech_list in zip(dataframe["job_title"], dataframe["job_tech_stack"]):
+        if pd.isna(title) or not all(
+            keyword.lower() in title.lower() for keyword in search_kws
+        ):
+            continue
+        for tech in tech_list:
+            tech = tech.upper()
+            expected_tech_stack.append("ANGOL" if "ANGOL" in tech else tech)
+    expected_counts = pd.Series(expected_tech_stack).value_counts()
+
+    assert list(tech_stack) == expected_tech_stack
+    assert list(tech_stack_counts.index) == list(expected_counts.index)
+    assert list(tech_stack_counts) == list(expected_counts)
+
+
+@pytest.mark.parametrize(
+    "keywords",
+    [
+        search_kws,
+        # Non-ASCII letters are folded as by pandas
+        ("Adatbázis", "MÉRNÖK"),
+        # LIKE wildcards in the keywords are matched literally
+        ("C_", "100%"),
+    ],
+)
+def test_fetch_tech_counts_from_db_matches_analyze_tech_stack(tmp_path, keywords):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    dataframe = pd.DataFrame(
+        {
+            "job_title": [
+                f"{keywords[0]} {keywords[1]}",
+                "Java developer",
+                f"Senior {keywords[1].upper()} of {keywords[0].lower()}",
+                "CX 1000 tester",
+            ],
+            "job_link": [f"https://example.com/{num}" for num in range(4)],
+            "job_tech_stack": [
+                ["Python", "Angol (B2)", "Német"],
+                ["Java"],
+                ["python", "SQL", "Angol C1", "német", "ÉLŐ adatbázis"],
+                ["C"],
+            ],
+        }
+    )
+    get_backend(db_uri).write("jobs", dataframe)
+
+    with patch("scripts.analyze_data.DB_URI", db_uri), patch(
+        "scripts.analyze_data.search_kws", keywords
+    ):
+        tech_stack_counts = fetch_tech_counts_from_db(["jobs"])
+        _, expected_counts = analyze_tech_stack(dataframe)
+    assert tech_stack_counts.to_dict() == expected_counts.to_dict()
+    assert expected_counts["NÉMET"] == 2
+
+
+def test_analyze_dataset_counts_the_last_scrape_of_each_job(tmp_path):
+    query = " ".join(search_kws).lower()
+    title = " ".join(search_kws)
+    for scrape_date, techs in [(date(2024, 1, 1), ["Java"]), (date(2024, 1, 2), [])]:
+        jobs = pd.DataFrame(
+            {
+                "job_title": [title, title, "Other"],
+                "job_link": ["link-1", f"link-{scrape_date.day + 1}", "link-9"],
+                "job_tech_stack": [["Python"], techs, ["Go"]],
+            }
+        )
+        with ParquetSink("prf", query, str(tmp_path), scrape_date=scrape_date) as sink:
+            sink.write(jobs)
+
+    data = fetch_data_from_dataset(str(tmp_path))
+    assert sorted(data["job_link"]) == ["link-1", "link-2", "link-3", "link-9"]
+    tech_stack, tech_stack_counts = analyze_tech_stack(data)
+    assert tech_stack_counts.to_dict() == {"PYTHON": 1, "JAVA": 1}
+
+
+def test_visualize_tech_stack_to_file(tmp_path):
+    tech_stack_counts = pd.Series(
+        [3, 2, 1], index=pd.Index(["PYTHON", "SQL", "GIT"], name="tech"), name="count"
+    )
+    output_path = tmp_path / "tech_stack.png"
+    visualize_tech_stack(tech_stack_counts, output_path=str(output_path))
+    assert output_path.read_bytes().startswith(b"\x89PNG")
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import pytest
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.archive import ReplayTransport, ResponseArchive
+from scripts.transport import FetchError, Transport
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_transport_records_every_response(tmp_path, stub_server):
+    stub_server.add_page("/page", "<p>árvíztűrő</p>")
+    archive_path = str(tmp_path / "responses.archive")
+    transport = Transport(archive=ResponseArchive(archive_path))
+    transport.get(f"{stub_server.url}/page")
+    transport.get(f"{stub_server.url}/missing")
+    transport.close()
+
+    # The archive is read back from its files, without network access
+    stub_server.requests.clear()
+    archive = ResponseArchive(archive_path)
+    assert len(archive) == 2
+    replay = ReplayTransport(archive)
+    page = replay.get(f"{stub_server.url}/page", cached=True)
+    assert page.status_code == 200
+    assert page.text == "<p>árvíztűrő</p>"
+    assert replay.get(f"{stub_server.url}/missing").status_code == 404
+    with pytest.raises(FetchError):
+        replay.get(f"{stub_server.url}/other")
+    assert replay.stats() == {"requests": 3, "misses": 1}
+    assert stub_server.requests == []
+
+
+def test_replay_until(tmp_path, stub_server):
+    clock = FakeClock()
+    archive = ResponseArchive(str(tmp_path / "responses.archive"), clock)
+    transport = Transport(archive=archive)
+    for version in range(3):
+        stub_server.add_page("/page", f"version {version}")
+        transport.get(f"{stub_server.url}/page")
+        clock.now += 10
+    transport.close()
+
+    assert ReplayTransport(archive).get(f"{stub_server.url}/page").text == "version 2"
+    replay = ReplayTransport(archive, until=115)
+    assert replay.get(f"{stub_server.url}/page").text == "version 1"
+    with pytest.raises(FetchError):
+        ReplayTransport(archive, until=50).get(f"{stub_server.url}/page")
+
+
+def test_interrupted_write_is_ignored(tmp_path, stub_server):
+    stub_server.add_page("/page", "body")
+    archive_path = str(tmp_path / "responses.archive")
+    transport = Transport(archive=ResponseArchive(archive_path))
+    transport.get(f"{stub_server.url}/page")
+    transport.get(f"{stub_server.url}/page")
+    transport.close()
+    # Crash while the second response was written
+    with open(archive_path, "rb+") as data_file:
+        data_file.truncate(os.path.getsize(archive_path) - 5)
+    with open(f"{archive_path}.idx", "a", encoding="utf-8") as index_file:
+        index_file.write('{"url": "ht')
+
+    archive = ResponseArchive(archive_path)
+    assert len(archive) == 1
+    assert ReplayTransport(archive).get(f"{stub_server.url}/page").text == "body"
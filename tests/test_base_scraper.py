@@ -0,0 +1,122 @@
+import os
+import sys
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.pagescrapers.prf_scraper import PrfScraper
+
+
+def subpage_html(techs):
+    spans = "".join(f"<span>{tech}</span>" for tech in techs)
+    return f"""
+    <div>
+        <span><img alt="technologies"></span>
+        <div>{spans}</div>
+    </div>
+    """
+
+
+@pytest.fixture
+def listing_soup(stub_server):
+    items = ""
+    for num in range(8):
+        stub_server.add_page(f"/job/{num}", subpage_html([f"Tech {num}", "SQL"]))
+        items += f"""
+        <li data-prof-name="Job {num}" data-item-brand="Company {num}"
+            data-link="{stub_server.url}/job/{num}">
+            <div class="job-card__text">Summary {num}</div>
+        </li>
+        """
+    return BeautifulSoup(f'<ul class="job-cards">{items}</ul>', "html.parser")
+
+
+def test_async_fetch_matches_serial(stub_server, listing_soup):
+    serial = PrfScraper(stub_server.url).extract_job_info_from_result(listing_soup)
+    concurrent = PrfScraper(
+        stub_server.url, async_fetch=True
+    ).extract_job_info_from_result(listing_soup)
+    assert concurrent == serial
+    assert concurrent[3].job_tech_stack == ["Tech 3", "SQL"]
+
+
+def test_async_fetch_respects_host_limit(stub_server, listing_soup):
+    stub_server.delay = 0.05
+    scraper = PrfScraper(stub_server.url, async_fetch=True, max_requests_per_host=3)
+    job_info = scraper.extract_job_info_from_result(listing_soup)
+    assert len(job_info) == 8
+    # Every subpage is downloaded once, at most 3 at a time
+    assert len(stub_server.requests) == 8
+    assert 1 < stub_server.max_in_flight <= 3
+
+
+def test_known_subpages_are_skipped(stub_server, listing_soup):
+    known_link = f"{stub_server.url}/job/2"
+    scraper = PrfScraper(stub_server.url, async_fetch=True, known_links={known_link})
+    job_info = scraper.extract_job_info_from_result(listing_soup)
+    assert len(job_info) == 8
+    assert job_info[2].job_link == known_link
+    assert job_info[2].job_tech_stack is None
+    requested_paths = [path for path, _ in stub_server.requests]
+    assert len(requested_paths) == 7
+    assert "/job/2" not in requested_paths
+
+
+def test_prefetch_failure_is_kept(stub_server):
+    scraper = PrfScraper(stub_server.url, async_fetch=True)
+    pages = scraper.fetch_subpages(["http://127.0.0.1:1/job", f"{stub_server.url}/x"])
+    # The failure is not requested again serially
+    assert isinstance(pages["http://127.0.0.1:1/job"], requests.RequestException)
+    assert pages[f"{stub_server.url}/x"].status_code == 404
+
+
+@pytest.mark.parametrize("async_fetch", [False, True])
+def test_failed_subpages_are_recorded(stub_server, listing_soup, async_fetch):
+    stub_server.add_failures("/job/5", 503)
+    scraper = PrfScraper(stub_server.url, async_fetch=async_fetch)
+    job_info = scraper.extract_job_info_from_result(listing_soup)
+    # The job is left out, to be scraped again by the next run
+    assert len(job_info) == 7
+    assert f"{stub_server.url}/job/5" not in [job.job_link for job in job_info]
+    assert scraper.failed_urls == [
+        {
+            "kind": "subpage",
+            "url": f"{stub_server.url}/job/5",
+            "page_url": stub_server.url,
+            "error": "Failed to retrieve the page. Status code: 503",
+        }
+    ]
+
+
+def test_failed_main_page_is_recorded(stub_server):
+    stub_server.add_page("/list", '<ul class="job-cards"></ul>')
+    stub_server.add_failures("/list", 503)
+    scraper = PrfScraper(f"{stub_server.url}/list")
+    assert scraper.scrape_main_page().empty
+    assert scraper.failed_urls[0]["kind"] == "main"
+    assert scraper.failed_urls[0]["url"] == f"{stub_server.url}/list"
+
+
+def test_find_last_page():
+    markup = """
+    <ul class="job-cards"></ul>
+    <ul class="pagination">
+        <li><a href="?page=1">1</a></li>
+        <li><a href="?page=2">2</a></li>
+        <li><a href="?page=12">12</a></li>
+        <li><a href="?page=2">Next</a></li>
+    </ul>
+    """
+    assert PrfScraper("https://example.com").find_last_page(markup) == 12
+    assert PrfScraper("https://example.com").find_last_page("<ul></ul>") is None
+
+
+if __name__ == "__main__":
+    pytest.main()
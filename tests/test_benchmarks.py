@@ -0,0 +1,60 @@
+import os
+import sys
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from benchmarks.run_benchmarks import compare_reports, run_benchmarks
+
+
+def test_run_benchmarks():
+    nof_url = os.environ.get("NOF_URL")
+
+    report = run_benchmarks(
+        analysis_rows=[500], load_rows=100, pages=1, jobs_per_page=3, repeat=1
+    )
+
+    names = [result["name"] for result in report["results"]]
+    assert names == [
+        "prf_listing",
+        "prf_listing_with_subpages",
+        "prf_subpage_extractors",
+        "nof_listing",
+        "nof_listing_with_subpages",
+        "nof_subpage_extractors",
+        "load_data_to_db_sqlite",
+        "analyze_tech_stack_500",
+    ]
+    for result in report["results"]:
+        assert result["seconds"] > 0
+        assert result["peak_mb"] > 0
+    # The nof link base set for the fixtures is not left behind
+    assert os.environ.get("NOF_URL") == nof_url
+
+
+def test_compare_reports():
+    baseline = {
+        "results": [
+            {"name": "parse", "items": 10, "seconds": 1.0},
+            {"name": "load", "items": 10, "seconds": 1.0},
+            {"name": "analyze", "items": 100, "seconds": 1.0},
+        ]
+    }
+    report = {
+        "results": [
+            {"name": "parse", "items": 10, "seconds": 1.1},
+            {"name": "load", "items": 10, "seconds": 1.5},
+            # Another table size is not compared
+            {"name": "analyze", "items": 1000, "seconds": 5.0},
+            {"name": "new", "items": 10, "seconds": 1.0},
+        ]
+    }
+
+    regressions = compare_reports(report, baseline, threshold=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("load: 1000.0 ms -> 1500.0 ms")
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import subprocess
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.cli import build_parser
+import cli
+import main
+
+
+def imported_modules(statement):
+    """Run the import statement in a fresh interpreter, return the loaded modules"""
+    code = f"import sys; sys.path.insert(0, {scripts_path!r}); {statement}; "
+    code += "import logging; print(len(logging.getLogger().handlers)); "
+    code += "print(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return int(output[0]), set(output[1].split())
+
+
+def test_scraping_does_not_import_plotting():
+    handler_count, modules = imported_modules("import main")
+    assert "matplotlib" not in modules
+    assert "seaborn" not in modules
+    # Importing does not configure the logging
+    assert handler_count == 0
+
+
+def test_cli_imports_only_the_standard_library():
+    handler_count, modules = imported_modules("import cli")
+    assert "pandas" not in modules
+    assert handler_count == 0
+
+
+def test_parser():
+    args = build_parser().parse_args(["scrape", "--sites", "nof", "--batch"])
+    assert args.command == "scrape"
+    assert args.sites == ["nof"]
+    assert args.batch
+    args = build_parser().parse_args(["plot", "--output", "chart.png"])
+    assert args.output == "chart.png"
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+
+
+def test_workers_reject_serial_options(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["scrape", "--workers", "2", "--batch", "--record"])
+    assert "--workers cannot be combined with --batch, --record" in (
+        capsys.readouterr().err
+    )
+
+
+def test_load_and_analyze(tmp_path, capsys):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    jobs = pd.DataFrame(
+        {
+            "job_title": ["Data engineer", "Senior data engineer", "Java developer"],
+            "company_name": ["Company 1", "Company 2", None],
+            "job_summary": ["", "Summary", "Summary"],
+            "job_link": [f"https://example.com/{num}" for num in range(3)],
+            "job_tech_stack": [["Python", "SQL"], ["Python"], None],
+        }
+    )
+    with patch("main.OUTPUT_CSV_FOLDER", str(tmp_path)), patch(
+        "main.DB_URI", db_uri
+    ), patch("analyze_data.DB_URI", db_uri):
+        main.load_data_to_csv("prf", jobs)
+        cli.main(
+            [
+                "--log-file",
+                str(tmp_path / "log"),
+                "--metrics",
+                str(tmp_path / "metrics.json"),
+                "--metrics",
+                str(tmp_path / "metrics.prom"),
+                "load",
+                "--sites",
+                "prf",
+                "--source",
+                "csv",
+            ]
+        )
+        assert "prf: 3 rows loaded" in capsys.readouterr().out
+        report = json.loads((tmp_path / "metrics.json").read_text())
+        assert {"name", "labels", "count", "sum", "mean", "buckets"} <= set(
+            next(
+                item
+                for item in report["histograms"]
+                if item["name"] == "db_load_seconds"
+            )
+        )
+        assert (
+            "job_scraping_db_loaded_rows_total"
+            in (tmp_path / "metrics.prom").read_text()
+        )
+
+        # The nof table is missing: only the jobs of the prf table are counted
+        with patch("analyze_data.SQL_PUSHDOWN", False), patch(
+            "analyze_data.fetch_data_from_db",
+            lambda table_names: main.get_backend(db_uri).read_table(table_names[0]),
+        ):
+            cli.main(["--log-file", str(tmp_path / "log"), "analyze", "--top", "1"])
+    output = capsys.readouterr().out
+    assert "PYTHON" in output
+    assert "SQL" not in output
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,89 @@
+import os
+import sys
+from datetime import date
+import pandas as pd
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.columnar import (
+    ParquetSink,
+    iter_dataset_records,
+    latest_scrape_date,
+    read_jobs,
+)
+
+
+def jobs(*nums, techs=("SQL",)):
+    return pd.DataFrame(
+        {
+            "job_title": [f"Job {num}" for num in nums],
+            "company_name": ["Company"] * len(nums),
+            "job_summary": [""] * len(nums),
+            "job_link": [f"https://example.com/{num}" for num in nums],
+            "job_tech_stack": [list(techs)] * len(nums),
+        }
+    )
+
+
+def write(folder, site, query, df, scrape_date, append=False):
+    with ParquetSink(site, query, str(folder), append, scrape_date) as sink:
+        sink.write(df)
+
+
+def test_read_jobs_with_projection_and_filters(tmp_path):
+    write(tmp_path, "prf", "data engineer", jobs(1, 2), date(2024, 1, 1))
+    write(tmp_path, "nof", "data engineer", jobs(3), date(2024, 1, 1))
+    write(tmp_path, "prf", "data engineer", jobs(4), date(2024, 1, 2))
+    write(tmp_path, "prf", "python developer", jobs(5), date(2024, 1, 2))
+
+    df = read_jobs(["job_link", "company_name"], str(tmp_path))
+    assert sorted(df.columns) == ["company_name", "job_link"]
+    assert len(df) == 5
+    # Dictionary encoded columns are read as categoricals
+    assert isinstance(df["company_name"].dtype, pd.CategoricalDtype)
+
+    df = read_jobs(
+        ["job_link", "scrape_date", "site"],
+        str(tmp_path),
+        sites=["prf"],
+        queries=["data engineer"],
+        start_date=date(2024, 1, 2),
+    )
+    assert list(df["job_link"]) == ["https://example.com/4"]
+    assert df["scrape_date"][0] == date(2024, 1, 2)
+    assert df["site"][0] == "prf"
+
+
+def test_sink_replaces_the_files_of_the_day(tmp_path):
+    write(tmp_path, "prf", "data engineer", jobs(1, 2), date(2024, 1, 1))
+    write(tmp_path, "prf", "python developer", jobs(3), date(2024, 1, 1))
+    write(tmp_path, "prf", "data engineer", jobs(4), date(2024, 1, 1))
+    write(tmp_path, "prf", "data engineer", jobs(5), date(2024, 1, 1), append=True)
+
+    df = read_jobs(["job_link"], str(tmp_path), queries=["data engineer"])
+    assert sorted(df["job_link"]) == ["https://example.com/4", "https://example.com/5"]
+    assert len(read_jobs(["job_link"], str(tmp_path))) == 3
+
+
+def test_iter_dataset_records_reads_the_last_scrape(tmp_path):
+    write(tmp_path, "prf", "data engineer", jobs(1), date(2024, 1, 1))
+    write(tmp_path, "prf", "data engineer", jobs(2, techs=()), date(2024, 1, 3))
+    write(tmp_path, "prf", "python developer", jobs(3), date(2024, 1, 5))
+
+    assert latest_scrape_date(str(tmp_path), "prf", "data engineer") == date(2024, 1, 3)
+    records = list(iter_dataset_records("prf", "data engineer", str(tmp_path)))
+    assert [record.to_dict() for record in records] == [
+        {
+            "job_title": "Job 2",
+            "company_name": "Company",
+            "job_summary": "",
+            "job_link": "https://example.com/2",
+            "job_tech_stack": [],
+        }
+    ]
+    assert list(iter_dataset_records("nof", "data engineer", str(tmp_path))) == []
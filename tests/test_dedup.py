@@ -0,0 +1,136 @@
+import os
+import sys
+import random
+import pandas as pd
+import pytest
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.dedup import (
+    NUM_PERM,
+    DuplicateFilter,
+    MinHasher,
+    decode_signatures,
+    encode_signatures,
+    posting_tokens,
+    similarity,
+)
+from scripts.records import JobRecord
+
+WORDS = [f"word{num}" for num in range(500)]
+TECHS = ["Python", "SQL", "Spark", "Airflow", "AWS", "Azure", "Java", "Scala", "Git"]
+
+
+def make_posting(num, rng):
+    return {
+        "job_title": f"Data engineer {rng.choice(WORDS)}",
+        "company_name": f"Company {num}",
+        "job_summary": " ".join(rng.choices(WORDS, k=40)),
+        "job_link": f"https://prf.example/{num}",
+        "job_tech_stack": rng.sample(TECHS, 4),
+    }
+
+
+def repost(posting, num):
+    """The same job on the other site, with a slightly different summary"""
+    summary = posting["job_summary"].split()
+    return {
+        **posting,
+        "company_name": posting["company_name"] + " Kft.",
+        "job_summary": " ".join(summary[:-2] + ["apply", "now"]),
+        "job_link": f"https://nof.example/{num}",
+        "job_tech_stack": list(reversed(posting["job_tech_stack"])),
+    }
+
+
+def test_posting_tokens():
+    tokens = posting_tokens(
+        JobRecord(
+            job_title="Data Engineer",
+            job_summary="Build the data pipelines",
+            job_tech_stack=["Python ", "SQL"],
+        )
+    )
+    assert tokens == {
+        "title:data",
+        "title:engineer",
+        "summary:build the data",
+        "summary:the data pipelines",
+        "tech:python",
+        "tech:sql",
+    }
+    assert posting_tokens(JobRecord(job_tech_stack=float("nan"))) == set()
+
+
+def test_signature_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    tokens = {f"token{num}" for num in range(100)}
+    other = {f"token{num}" for num in range(50, 150)}
+    estimate = similarity(hasher.signature(tokens), hasher.signature(other))
+    assert estimate == pytest.approx(50 / 150, abs=0.1)
+    assert hasher.signature([]) is None
+
+
+def test_duplicate_filter_streams_across_sites():
+    rng = random.Random(1)
+    stored = [make_posting(num, rng) for num in range(100)]
+    duplicate_filter = DuplicateFilter()
+    duplicate_filter.load(pd.DataFrame(stored))
+    assert len(duplicate_filter) == 100
+
+    new_postings = [make_posting(num, rng) for num in range(100, 110)]
+    records = [
+        JobRecord.from_dict(posting)
+        for posting in [
+            repost(stored[5], 5),
+            new_postings[0],
+            repost(new_postings[0], 100),
+            # A known job without subpage data is passed through
+            {**stored[7], "job_summary": None, "job_tech_stack": None},
+        ]
+    ]
+    marked = list(duplicate_filter.mark_duplicates(records))
+    assert [record.duplicate_of for record in marked] == [
+        "https://prf.example/5",
+        None,
+        "https://prf.example/100",
+        None,
+    ]
+    assert not marked[3].deduplicated
+    # The repost of a repost points to the canonical posting
+    assert (
+        duplicate_filter.add(JobRecord.from_dict(repost(marked[0].to_dict(), 5)))
+        == "https://prf.example/5"
+    )
+
+
+def test_duplicate_filter_loads_saved_signatures():
+    rng = random.Random(2)
+    stored = [make_posting(num, rng) for num in range(50)]
+    duplicate_filter = DuplicateFilter()
+    duplicate_filter.load(pd.DataFrame(stored))
+    saved = duplicate_filter.take_unsaved_signatures()
+    assert len(saved) == 50
+    assert duplicate_filter.take_unsaved_signatures() == {}
+
+    # The signatures survive a round trip through their text encoding
+    links = list(saved)
+    decoded = decode_signatures(encode_signatures(list(saved.values())), NUM_PERM)
+    signatures = dict(zip(links, decoded))
+    reloaded = DuplicateFilter()
+    # Only the links are needed for the postings with a saved signature
+    reloaded.load(pd.DataFrame({"job_link": links}), signatures)
+    assert len(reloaded) == 50
+    assert reloaded.unsaved_signatures == {}
+    record = JobRecord.from_dict(repost(stored[7], 7))
+    assert reloaded.add(record) == "https://prf.example/7"
+    assert list(reloaded.take_unsaved_signatures()) == ["https://nof.example/7"]
+
+
+if __name__ == "__main__":
+    pytest.main()
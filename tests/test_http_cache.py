@@ -0,0 +1,117 @@
+import os
+import sys
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.http_cache import ResponseCache
+from scripts.transport import Transport
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_fresh_entry_is_served_without_request(stub_server, tmp_path, clock):
+    stub_server.add_page("/job", "<p>Jób</p>")
+    cache = ResponseCache(str(tmp_path), max_age=60, clock=clock)
+    transport = Transport(cache=cache)
+    first = transport.get(f"{stub_server.url}/job", cached=True)
+    second = transport.get(f"{stub_server.url}/job", cached=True)
+    transport.close()
+    assert first.text == second.text == "<p>Jób</p>"
+    assert len(stub_server.requests) == 1
+    assert transport.stats()["cache_hits"] == 1
+
+
+def test_stale_entry_is_revalidated(stub_server, tmp_path, clock):
+    stub_server.add_page("/job", "<p>Job</p>", headers={"ETag": '"v1"'})
+    transport = Transport(cache=ResponseCache(str(tmp_path), max_age=60, clock=clock))
+    transport.get(f"{stub_server.url}/job", cached=True)
+    clock.now += 120
+    response = transport.get(f"{stub_server.url}/job", cached=True)
+    transport.close()
+    assert response.status_code == 200
+    assert response.text == "<p>Job</p>"
+    assert stub_server.requests[1][1]["If-None-Match"] == '"v1"'
+    assert transport.stats()["revalidated"] == 1
+
+
+def test_revalidation_stores_the_new_validators(stub_server, tmp_path, clock):
+    headers = {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    stub_server.add_page("/job", "<p>Job</p>", headers=headers)
+    transport = Transport(cache=ResponseCache(str(tmp_path), max_age=60, clock=clock))
+    transport.get(f"{stub_server.url}/job", cached=True)
+    # The 304 response carries a new Last-Modified date for the same ETag
+    headers["Last-Modified"] = "Tue, 02 Jan 2024 00:00:00 GMT"
+    clock.now += 120
+    transport.get(f"{stub_server.url}/job", cached=True)
+    clock.now += 120
+    transport.get(f"{stub_server.url}/job", cached=True)
+    transport.close()
+    assert stub_server.requests[2][1]["If-Modified-Since"] == headers["Last-Modified"]
+    assert transport.stats()["revalidated"] == 2
+
+
+def test_concurrent_writes_of_an_entry(stub_server, tmp_path, clock):
+    stub_server.add_page("/job", "<p>Job</p>")
+    cache = ResponseCache(str(tmp_path), clock=clock)
+    transport = Transport()
+    response = transport.get(f"{stub_server.url}/job")
+    transport.close()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [
+            executor.submit(cache.store, "https://example.com/job", response)
+            for _ in range(50)
+        ]:
+            future.result()
+    meta, body = cache.load("https://example.com/job")
+    assert body == b"<p>Job</p>"
+    # No temporary file is left behind
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.total_size == 50 * len(body)
+
+
+def test_uncached_requests_and_errors_are_not_stored(stub_server, tmp_path, clock):
+    stub_server.add_page("/list", "<ul></ul>")
+    transport = Transport(cache=ResponseCache(str(tmp_path), clock=clock))
+    transport.get(f"{stub_server.url}/list")
+    transport.get(f"{stub_server.url}/missing", cached=True)
+    transport.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_eviction_by_age_and_size(stub_server, tmp_path, clock):
+    for num in range(3):
+        stub_server.add_page(f"/job/{num}", "x" * 100)
+    cache = ResponseCache(str(tmp_path), max_stale_age=500, max_size=250, clock=clock)
+    transport = Transport(cache=cache)
+    for num in range(3):
+        transport.get(f"{stub_server.url}/job/{num}", cached=True)
+        clock.now += 10
+    transport.close()
+    # The oldest entry is dropped to fit the size limit
+    assert cache.load(f"{stub_server.url}/job/0") is None
+    assert cache.load(f"{stub_server.url}/job/2") is not None
+    clock.now += 1000
+    cache.evict()
+    assert os.listdir(tmp_path) == []
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -5,6 +5,11 @@ from unittest.mock import patch
 import pytest
 import urllib.parse
 import sys
+import time
+import requests
+from datetime import date
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Get the absolute path of the current script
 current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -20,7 +25,32 @@ from scripts.main import (
     get_scraper,
     convert_series_to_json,
     perform_scraping,
+    fetch_known_links,
+    upsert_data_to_db,
+    iter_batches,
+    store_job_records,
+    get_and_store_all_job_data,
+    get_and_store_job_data,
+    get_and_store_batch_job_data,
+    get_table_name,
+    crawl_with_queue,
+    store_queue_results,
+    iter_job_records,
+    load_dataset_to_db,
+    load_failed_urls,
+    refetch_failed_urls,
+    reextract_archive,
+    load_duplicate_filter,
+    save_duplicate_signatures,
 )
+from scripts.transport import Transport
+from scripts.storage import get_backend
+from scripts.work_queue import WorkQueue
+from scripts.archive import ReplayTransport, ResponseArchive
+from scripts.records import JobRecord
+from scripts.columnar import read_jobs
+from scripts.analyze_data import analyze_tech_stack, fetch_data_from_dataset
+from sqlalchemy import create_engine
 
 
 def test_construct_url():
@@ -46,12 +76,601 @@ def test_convert_series_to_json():
     assert result[0] == json.dumps("a")
 
 
-# Slow test, disable to run fast
-def test_perform_scraping():
-    with patch("time.sleep", return_value=None):
-        job_info_df = perform_scraping("prf")
-        assert isinstance(job_info_df, pd.DataFrame)
-        assert len(job_info_df) > 0
+def test_convert_series_to_json_keeps_missing_values():
+    result = convert_series_to_json(pd.Series([["SQL"], None]))
+    assert result[0] == '["SQL"]'
+    assert pd.isna(result[1])
+
+
+def test_upsert_data_to_db(tmp_path):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    first_run = pd.DataFrame(
+        {
+            "job_title": ["Job 1", "Job 2"],
+            "company_name": ["Company 1", "Company 2"],
+            "job_summary": ["Summary 1", "Summary 2"],
+            "job_link": ["https://example.com/1", "https://example.com/2"],
+            "job_tech_stack": [["SQL"], ["Python", "Git"]],
+        }
+    )
+    # Job 2 is known on the second run, so its subpage data is missing
+    second_run = pd.DataFrame(
+        {
+            "job_title": ["Job 2 renamed", "Job 3"],
+            "company_name": [None, "Company 3"],
+            "job_summary": [None, "Summary 3"],
+            "job_link": ["https://example.com/2", "https://example.com/3"],
+            "job_tech_stack": [None, ["Java"]],
+        }
+    )
+    with patch("scripts.main.DB_URI", db_uri):
+        assert fetch_known_links("prf") == set()
+        upsert_data_to_db("prf", first_run)
+        upsert_data_to_db("prf", second_run)
+        known_links = fetch_known_links("prf")
+
+    assert known_links == {f"https://example.com/{num}" for num in range(1, 4)}
+    stored = (
+        get_backend(db_uri)
+        .read_table("data_engineer_prf")
+        .sort_values("job_link", ignore_index=True)
+    )
+    assert list(stored["job_title"]) == ["Job 1", "Job 2 renamed", "Job 3"]
+    assert list(stored["company_name"]) == ["Company 1", "Company 2", "Company 3"]
+    assert list(stored["job_tech_stack"]) == [["SQL"], ["Python", "Git"], ["Java"]]
+    assert stored.loc[1, "first_seen"] < stored.loc[1, "last_seen"]
+    assert stored.loc[0, "first_seen"] == stored.loc[0, "last_seen"]
+
+
+def test_iter_batches():
+    batches = list(iter_batches(iter(range(7)), 3))
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_store_job_records_streams_batches(tmp_path):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    engine = create_engine(db_uri)
+    stored_while_scraping = []
+
+    def records():
+        for num in range(5):
+            if num == 3:
+                # The first batch is stored before the crawl finishes
+                stored_while_scraping.append(
+                    pd.read_sql_query("SELECT * FROM data_engineer_nof", engine)
+                )
+            yield JobRecord(
+                f"Job {num}",
+                f"Company {num}",
+                "",
+                f"https://example.com/{num}",
+                ["SQL"],
+            )
+
+    with patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.OUTPUT_CSV_FOLDER", str(tmp_path)
+    ), patch("scripts.main.OUTPUT_FORMAT", "csv"):
+        row_count = store_job_records("nof", records(), batch_size=2)
+
+    assert row_count == 5
+    assert len(stored_while_scraping[0]) == 2
+    stored = pd.read_sql_query("SELECT * FROM data_engineer_nof", engine)
+    assert len(stored) == 5
+    csv_data = pd.read_csv(tmp_path / "nof_data_engineer_job_data.csv")
+    assert list(csv_data["job_title"]) == [f"Job {num}" for num in range(5)]
+    assert csv_data["job_tech_stack"][0] == '["SQL"]'
+
+
+def test_store_job_records_to_dataset(tmp_path):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    records = [
+        JobRecord(
+            f"Job {num}",
+            "Company",
+            "",
+            f"https://example.com/{num}",
+            ["SQL", "Python"] if num else None,
+        )
+        for num in range(5)
+    ]
+    with patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.DATASET_FOLDER", str(tmp_path / "dataset")
+    ):
+        store_job_records("nof", records, batch_size=2)
+        # A second run of the day replaces the file of the first one
+        store_job_records("nof", records[:3], batch_size=2)
+        assert load_dataset_to_db("nof", incremental=False) == 3
+
+    partition = tmp_path / "dataset" / f"scrape_date={date.today()}" / "site=nof"
+    [path] = partition.iterdir()
+    assert path.name.startswith("data_engineer-")
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.schema_arrow.field("job_tech_stack").type == pa.list_(
+        pa.string()
+    )
+    stored = get_backend(db_uri).read_table("data_engineer_nof")
+    assert list(stored["job_link"]) == [
+        f"https://example.com/{num}" for num in range(3)
+    ]
+    assert list(stored["job_tech_stack"][1]) == ["SQL", "Python"]
+
+
+def test_known_jobs_keep_their_duplicate_of(tmp_path):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    duplicate = JobRecord(
+        "Job 2",
+        job_link="https://example.com/2",
+        job_tech_stack=["SQL"],
+        duplicate_of="https://example.com/1",
+        deduplicated=True,
+    )
+    new_job = JobRecord(
+        "Job 3", job_link="https://example.com/3", job_tech_stack=[], deduplicated=True
+    )
+    with patch("scripts.main.DB_URI", db_uri):
+        store_job_records("nof", [duplicate], incremental=True, to_file=False)
+        # The subpage of the known job is skipped, the new one is checked
+        known_job = JobRecord("Job 2", job_link="https://example.com/2")
+        store_job_records("nof", [known_job, new_job], incremental=True, to_file=False)
+    stored = get_backend(db_uri).read_table("data_engineer_nof")
+    duplicate_links = stored.set_index("job_link")["duplicate_of"]
+    assert duplicate_links["https://example.com/2"] == "https://example.com/1"
+    assert pd.isna(duplicate_links["https://example.com/3"])
+
+
+def test_get_and_store_all_job_data_runs_sites_concurrently():
+    def scrape_site(prefix, transport, duplicate_filter):
+        time.sleep(0.3)
+        if prefix == "nof":
+            raise RuntimeError("site down")
+
+    with patch(
+        "scripts.main.get_and_store_job_data", side_effect=scrape_site
+    ) as mock_scrape, patch("scripts.main.DEDUPLICATE", False):
+        start = time.perf_counter()
+        get_and_store_all_job_data(["prf", "nof"], parallel=True)
+        elapsed = time.perf_counter() - start
+
+    # A failing site does not stop the other one
+    assert mock_scrape.call_count == 2
+    assert elapsed < 0.55
+
+
+def test_duplicate_filter_reuses_saved_signatures(tmp_path):
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    jobs = pd.DataFrame(
+        {
+            "job_title": [f"Data engineer {num}" for num in range(3)],
+            "company_name": [f"Company {num}" for num in range(3)],
+            "job_summary": [f"Build the pipelines of team {num}" for num in range(3)],
+            "job_link": [f"https://example.com/{num}" for num in range(3)],
+            "job_tech_stack": [["Python", "SQL"], ["Spark"], ["Go", "Kafka"]],
+            "duplicate_of": [None, None, "https://example.com/0"],
+        }
+    )
+    get_backend(db_uri).upsert(get_table_name("prf"), jobs)
+    with patch("scripts.main.DB_URI", db_uri):
+        duplicate_filter = load_duplicate_filter(["prf", "nof"])
+        assert len(duplicate_filter.unsaved_signatures) == 3
+        save_duplicate_signatures(duplicate_filter)
+
+        # The next run reads the saved signatures instead of hashing the jobs
+        with patch("scripts.main.JOB_COLUMNS", []):
+            duplicate_filter = load_duplicate_filter(["prf", "nof"])
+    assert len(duplicate_filter) == 3
+    assert duplicate_filter.unsaved_signatures == {}
+    repost = JobRecord.from_dict(
+        {**jobs.iloc[1].to_dict(), "job_link": "https://other.example/1"}
+    )
+    assert duplicate_filter.add(repost) == "https://example.com/1"
+    assert duplicate_filter.canonical_links[2] == "https://example.com/0"
+
+
+def test_refetch_failed_urls(tmp_path, stub_server):
+    items = ""
+    for num in range(3):
+        stub_server.add_page(
+            f"/job/{num}", '<span><img alt="technologies"></span><div></div>'
+        )
+        items += f"""
+        <li data-prof-name="Job {num}" data-item-brand="Company {num}"
+            data-link="{stub_server.url}/job/{num}">
+            <div class="job-card__text">Summary {num}</div>
+        </li>
+        """
+    stub_server.add_page("/list", f'<ul class="job-cards">{items}</ul>')
+    stub_server.add_failures("/job/1", 503)
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    transport = Transport()
+
+    with patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.DATASET_FOLDER", str(tmp_path)
+    ), patch("scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")):
+        records = iter_job_records(
+            "prf", transport, page_urls=[f"{stub_server.url}/list"]
+        )
+        assert store_job_records("prf", records) == 2
+        failures = load_failed_urls()
+        assert [(entry["prefix"], entry["url"]) for entry in failures] == [
+            ("prf", f"{stub_server.url}/job/1")
+        ]
+
+        stub_server.requests.clear()
+        assert refetch_failed_urls("prf", transport) == 3
+        assert load_failed_urls() == []
+        assert refetch_failed_urls("prf", transport) == 0
+    transport.close()
+
+    # Only the failed subpage is downloaded again
+    requested_paths = [path for path, _ in stub_server.requests]
+    assert requested_paths == ["/list", "/job/1"]
+    stored = get_backend(db_uri).read_table("data_engineer_prf")
+    assert sorted(stored["job_title"]) == ["Job 0", "Job 1", "Job 2"]
+
+
+def add_listing_pages(stub_server, page_links, pagination="", path="/list"):
+    """Serve <path>/<page_num> pages with the given job numbers and their subpages"""
+    for page_num, job_nums in enumerate(page_links, start=1):
+        items = ""
+        for num in job_nums:
+            stub_server.add_page(
+                f"/job/{num}", '<span><img alt="technologies"></span><div></div>'
+            )
+            items += f"""
+            <li data-prof-name="Job {num}" data-item-brand="Company {num}"
+                data-link="{stub_server.url}/job/{num}">
+                <div class="job-card__text">Summary {num}</div>
+            </li>
+            """
+        stub_server.add_page(
+            f"{path}/{page_num}", f'<ul class="job-cards">{items}</ul>{pagination}'
+        )
+
+
+def requested_pages(stub_server):
+    return [path for path, _ in stub_server.requests if path.startswith("/list/")]
+
+
+def test_iter_job_records_stops_at_last_page(tmp_path, stub_server):
+    pagination = '<ul class="pagination"><a>1</a><a>2</a><a>3</a></ul>'
+    add_listing_pages(stub_server, [[1, 2], [3, 4], [5], [6]], pagination)
+    transport = Transport()
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")):
+        records = list(iter_job_records("prf", transport))
+    transport.close()
+
+    assert [record.job_title for record in records] == [
+        f"Job {num}" for num in range(1, 6)
+    ]
+    assert requested_pages(stub_server) == ["/list/1", "/list/2", "/list/3"]
+
+
+def test_iter_job_records_stops_without_new_jobs(tmp_path, stub_server):
+    # The site repeats the last page for out of range page numbers
+    add_listing_pages(stub_server, [[1, 2], [3], [3], [3], [3]])
+    stub_server.delay = 0.02
+    transport = Transport()
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")):
+        records = list(iter_job_records("prf", transport))
+    transport.close()
+
+    assert len({record.job_link for record in records}) == 3
+    pages = requested_pages(stub_server)
+    # Page 4 is at most prefetched before the repeated page 3 stops the crawl
+    assert pages[:3] == ["/list/1", "/list/2", "/list/3"]
+    assert len(pages) <= 4
+    # Page 2 is downloaded while the subpages of page 1 are processed
+    paths = [path for path, _ in stub_server.requests]
+    assert paths.index("/list/2") < paths.index("/job/2")
+
+
+def test_incremental_crawl_writes_the_stored_fields(tmp_path, stub_server):
+    add_listing_pages(stub_server, [[1, 2]])
+    stub_server.add_page(
+        "/job/1",
+        '<span><img alt="technologies"></span>'
+        "<div><span>Python</span><span>SQL</span></div>",
+    )
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    dataset_folder = str(tmp_path / "dataset")
+    transport = Transport()
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.DATASET_FOLDER", dataset_folder
+    ), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ), patch(
+        "scripts.main.INCREMENTAL", True
+    ):
+        get_and_store_job_data("prf", transport)
+        # The second crawl of the day skips the known subpages and replaces
+        # the output of the first one
+        get_and_store_job_data("prf", transport)
+        assert load_dataset_to_db("prf", incremental=False) == 2
+    transport.close()
+
+    job_paths = [path for path, _ in stub_server.requests if path.startswith("/job/")]
+    assert sorted(job_paths) == ["/job/1", "/job/2"]
+    jobs = fetch_data_from_dataset(dataset_folder).sort_values("job_link")
+    assert list(jobs["job_tech_stack"].map(list)) == [["Python", "SQL"], []]
+    jobs["job_title"] = "Data engineer"
+    assert analyze_tech_stack(jobs)[1].to_dict() == {"PYTHON": 1, "SQL": 1}
+    stored = get_backend(db_uri).read_table("data_engineer_prf")
+    assert list(stored.sort_values("job_link")["job_tech_stack"]) == [
+        ["Python", "SQL"],
+        [],
+    ]
+
+
+def test_incremental_crawl_writes_the_stored_fields_to_csv(tmp_path, stub_server):
+    add_listing_pages(stub_server, [[1, 2]])
+    stub_server.add_page(
+        "/job/1",
+        '<span><img alt="technologies"></span><div><span>Python</span></div>',
+    )
+    transport = Transport()
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.DB_URI", f"sqlite:///{tmp_path / 'jobs.db'}"), patch(
+        "scripts.main.OUTPUT_FORMAT", "csv"
+    ), patch(
+        "scripts.main.OUTPUT_CSV_FOLDER", str(tmp_path)
+    ), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ), patch(
+        "scripts.main.INCREMENTAL", True
+    ):
+        get_and_store_job_data("prf", transport)
+        get_and_store_job_data("prf", transport)
+    transport.close()
+
+    csv_data = pd.read_csv(tmp_path / "prf_data_engineer_job_data.csv")
+    assert list(csv_data["company_name"]) == ["Company 1", "Company 2"]
+    assert list(csv_data["job_tech_stack"]) == ['["Python"]', "[]"]
+
+
+def test_batch_crawl_scrapes_shared_jobs_once(tmp_path, stub_server):
+    add_listing_pages(stub_server, [[1, 2]], path="/data")
+    add_listing_pages(stub_server, [[2, 3]], path="/python")
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    transport = Transport()
+    stored_before_query = {}
+
+    def construct_url(prefix, page_num, keywords):
+        if keywords[0] not in stored_before_query:
+            backend = get_backend(db_uri)
+            stored_before_query[keywords[0]] = (
+                len(backend.read_table("batch_prf"))
+                if backend.has_table("batch_prf")
+                else 0
+            )
+        return f"{stub_server.url}/{keywords[0].lower()}/{page_num}"
+
+    with patch("scripts.main.construct_url", construct_url), patch(
+        "scripts.main.DB_URI", db_uri
+    ), patch("scripts.main.DATASET_FOLDER", str(tmp_path / "dataset")), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ):
+        get_and_store_batch_job_data(
+            "prf", [("Data", "engineer"), ("Python", "developer")], transport
+        )
+    transport.close()
+
+    job_paths = [path for path, _ in stub_server.requests if path.startswith("/job/")]
+    assert sorted(job_paths) == ["/job/1", "/job/2", "/job/3"]
+    assert get_table_name("prf", None) == "batch_prf"
+    stored = (
+        get_backend(db_uri)
+        .read_table("batch_prf")
+        .sort_values("job_link", ignore_index=True)
+    )
+    assert list(stored["matched_queries"]) == [
+        "data engineer",
+        "data engineer,python developer",
+        "python developer",
+    ]
+    # The jobs of a query are stored before the next query is crawled
+    assert stored_before_query == {"Data": 0, "Python": 2}
+    # The shared job is written once to the output file
+    written = read_jobs(["job_link"], str(tmp_path / "dataset"))
+    assert len(written) == 3
+    # Each query has its own snapshot of the postings it found
+    snapshots = get_backend(db_uri).read_query(
+        "SELECT query, COUNT(*) AS count FROM job_snapshots "
+        "GROUP BY query ORDER BY query"
+    )
+    assert list(snapshots["query"]) == ["data engineer", "python developer"]
+    assert list(snapshots["count"]) == [2, 2]
+
+
+@pytest.mark.parametrize("worker_count", [0, 2])
+def test_crawl_with_queue(tmp_path, stub_server, worker_count):
+    pagination = '<ul class="pagination"><a>1</a><a>2</a></ul>'
+    add_listing_pages(stub_server, [[1, 2], [3, 4]], pagination)
+    # Every try of the task of job 4 fails
+    stub_server.add_failures("/job/4", 503, 503, 503)
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    queue_path = str(tmp_path / "queue.db")
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ), patch(
+        "scripts.main.DATASET_FOLDER", str(tmp_path / "dataset")
+    ), patch(
+        "scripts.main.STORE_INTERVAL", 0.05
+    ), patch(
+        "scripts.main.IDLE_WAIT", 0.01
+    ), patch(
+        # Neither rate limited nor retried
+        "scripts.main.create_transport",
+        lambda worker_count=1: Transport(),
+    ):
+        assert crawl_with_queue(["prf"], worker_count, queue_path) == 3
+        failures = load_failed_urls()
+
+    assert not os.path.exists(queue_path)
+    assert [(entry["kind"], entry["url"]) for entry in failures] == [
+        ("subpage", f"{stub_server.url}/job/4")
+    ]
+    assert failures[0]["page_url"] == f"{stub_server.url}/list/2"
+    stored = get_backend(db_uri).read_table("data_engineer_prf")
+    assert sorted(stored["job_title"]) == ["Job 1", "Job 2", "Job 3"]
+    # The jobs are also written to the dataset, as by the other scrape modes
+    written = read_jobs(["job_title"], str(tmp_path / "dataset"))
+    assert sorted(written["job_title"]) == ["Job 1", "Job 2", "Job 3"]
+    # The crawl is stored as a snapshot of its postings
+    snapshot = get_backend(db_uri).read_query("SELECT job_link FROM job_snapshots")
+    assert len(snapshot) == 3
+
+
+def test_crawl_with_queue_resumes(tmp_path, stub_server):
+    add_listing_pages(stub_server, [[1, 2, 3, 4]])
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    queue_path = str(tmp_path / "queue.db")
+    list_url = f"{stub_server.url}/list/1"
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ), patch(
+        "scripts.main.DATASET_FOLDER", str(tmp_path / "dataset")
+    ), patch(
+        "scripts.main.create_transport", lambda worker_count=1: Transport()
+    ):
+        # State left by a crashed crawl: the listing page and jobs 1 and 2 are
+        # done, job 1 is stored but job 2 is not yet, and job 3 was being scraped
+        queue = WorkQueue(queue_path)
+        queue.add("listing", "prf", list_url, {"page_num": 1, "last_page": None})
+        queue.complete(queue.claim("worker-0"))
+        for num in range(1, 5):
+            item = (
+                f'<li data-prof-name="Job {num}" data-item-brand="Company {num}" '
+                f'data-link="{stub_server.url}/job/{num}">'
+                f'<div class="job-card__text">Summary {num}</div></li>'
+            )
+            queue.add(
+                "subpage",
+                "prf",
+                f"{stub_server.url}/job/{num}",
+                {"item": item, "page_url": list_url},
+            )
+        for _ in range(2):
+            job = queue.claim("worker-0")
+            queue.complete(job, {"job_title": "Job", "job_link": job.url})
+            if job.url.endswith("/job/1"):
+                store_queue_results(queue)
+        queue.claim("worker-1")
+        queue.close()
+
+        assert crawl_with_queue(["prf"], 0, queue_path) == 3
+
+    requested_paths = sorted(path for path, _ in stub_server.requests)
+    assert requested_paths == ["/job/3", "/job/4"]
+    stored = get_backend(db_uri).read_table("data_engineer_prf")
+    assert sorted(stored["job_link"]) == [
+        f"{stub_server.url}/job/{num}" for num in range(1, 5)
+    ]
+    # The snapshot has the jobs stored before the crash as well
+    snapshot = get_backend(db_uri).read_query("SELECT job_link FROM job_snapshots")
+    assert len(snapshot) == 4
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_reextract_archive(tmp_path, stub_server, workers):
+    add_listing_pages(stub_server, [[1, 2], [3]])
+    for num in range(1, 4):
+        stub_server.add_page(
+            f"/job/{num}",
+            '<span><img alt="technologies"></span>'
+            f"<div><span>Python</span><span>Tech {num}</span></div>",
+        )
+    db_uri = f"sqlite:///{tmp_path / 'jobs.db'}"
+    archive_path = str(tmp_path / "responses.archive")
+    with patch(
+        "scripts.main.construct_url",
+        lambda prefix, page_num, keywords: f"{stub_server.url}/list/{page_num}",
+    ), patch("scripts.main.DB_URI", db_uri), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ):
+        # A crawl recorded with a broken tech stack extractor
+        transport = Transport(archive=ResponseArchive(archive_path))
+        with patch(
+            "pagescrapers.prf_scraper.PrfScraper.extract_job_tech_stack_from_result",
+            return_value=[],
+        ):
+            records = iter_job_records("prf", transport)
+            store_job_records("prf", records, incremental=True, to_file=False)
+        transport.close()
+
+        stub_server.requests.clear()
+        assert reextract_archive("prf", archive_path, workers=workers) == 3
+
+    # The stored jobs are fixed without any request to the site
+    assert stub_server.requests == []
+    stored = (
+        get_backend(db_uri)
+        .read_table("data_engineer_prf")
+        .sort_values("job_link", ignore_index=True)
+    )
+    assert list(stored["job_tech_stack"]) == [
+        ["Python", f"Tech {num}"] for num in range(1, 4)
+    ]
+
+
+def archived_response(url, body):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body.encode("utf-8")
+    response.encoding = "utf-8"
+    return response
+
+
+def test_perform_scraping(tmp_path):
+    # Pages of the site recorded in an archive, replayed without network access
+    archive = ResponseArchive(str(tmp_path / "responses.archive"))
+    with patch("scripts.main.PRF_URL", "https://www.profession.hu/allasok/"), patch(
+        "scripts.main.FAILED_URLS_FILE", str(tmp_path / "failed.jsonl")
+    ):
+        items = ""
+        for num in range(2):
+            job_url = f"https://www.profession.hu/allas/{num}"
+            items += f"""
+            <li data-prof-name="Data engineer {num}" data-item-brand="Company"
+                data-link="{job_url}">
+                <div class="job-card__text">Summary {num}</div>
+            </li>
+            """
+            archive.record(
+                archived_response(
+                    job_url,
+                    '<span><img alt="technologies"></span><div><span>SQL</span></div>',
+                )
+            )
+        archive.record(
+            archived_response(
+                construct_url("prf", 1),
+                f'<ul class="job-cards">{items}</ul>'
+                '<ul class="pagination"><a>1</a></ul>',
+            )
+        )
+        job_info_df = perform_scraping("prf", ReplayTransport(archive))
+    assert isinstance(job_info_df, pd.DataFrame)
+    assert len(job_info_df) > 0
+    assert list(job_info_df["job_tech_stack"]) == [["SQL"], ["SQL"]]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import pytest
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.metrics import MetricsRegistry
+from scripts.transport import Transport
+from scripts.pagescrapers.prf_scraper import PrfScraper
+from metrics import registry
+
+
+def test_registry_exports():
+    metrics = MetricsRegistry(clock=lambda: 100.0)
+    metrics.increment("downloaded_bytes", 100, host="example.com")
+    metrics.increment("downloaded_bytes", 50, host="example.com")
+    metrics.set_gauge("rows_per_second", 12.5, site="prf")
+    for seconds in (0.001, 0.2, 60):
+        metrics.observe("fetch_seconds", seconds, host="example.com", status=200)
+
+    report = metrics.to_dict()
+    assert report["counters"] == [
+        {"name": "downloaded_bytes", "labels": {"host": "example.com"}, "value": 150}
+    ]
+    histogram = report["histograms"][0]
+    assert histogram["labels"] == {"host": "example.com", "status": "200"}
+    assert histogram["count"] == 3
+    # The bounds are inclusive and the buckets cumulative
+    assert histogram["buckets"]["0.001"] == 1
+    assert histogram["buckets"]["0.25"] == 2
+    assert histogram["buckets"]["+Inf"] == 3
+
+    lines = metrics.to_prometheus().splitlines()
+    assert "# TYPE job_scraping_downloaded_bytes_total counter" in lines
+    assert 'job_scraping_downloaded_bytes_total{host="example.com"} 150' in lines
+    assert 'job_scraping_rows_per_second{site="prf"} 12.5' in lines
+    assert (
+        'job_scraping_fetch_seconds_bucket{host="example.com",status="200",le="+Inf"} 3'
+        in lines
+    )
+    assert (
+        'job_scraping_fetch_seconds_count{host="example.com",status="200"} 3' in lines
+    )
+
+
+def test_transport_and_scraper_metrics(stub_server):
+    registry.reset()
+    stub_server.add_page(
+        "/list",
+        '<ul class="job-cards"><li data-prof-name="Data engineer" '
+        f'data-item-brand="Company" data-link="{stub_server.url}/job">'
+        '<div class="job-card__text">Summary</div></li></ul>',
+    )
+    stub_server.add_page(
+        "/job", '<span><img alt="technologies"></span><div><span>Python</span></div>'
+    )
+    stub_server.add_page("/missing", "", status=404)
+    transport = Transport()
+    scraper = PrfScraper(f"{stub_server.url}/list", transport=transport)
+    assert len(scraper.scrape_main_page()) == 1
+    transport.get(f"{stub_server.url}/missing")
+    transport.close()
+
+    host = stub_server.url.split("//")[1]
+    report = registry.to_dict()
+    fetches = {
+        item["labels"]["status"]: item["count"]
+        for item in report["histograms"]
+        if item["name"] == "fetch_seconds" and item["labels"]["host"] == host
+    }
+    assert fetches == {"200": 2, "404": 1}
+    assert registry.counter_value("downloaded_bytes", host=host) > 0
+    assert registry.counter_value("extracted_jobs", scraper="PrfScraper") == 1
+    timed = {
+        (item["name"], item["labels"].get("method", item["labels"].get("page")))
+        for item in report["histograms"]
+    }
+    assert ("parse_seconds", "main") in timed
+    assert ("parse_seconds", "subpage") in timed
+    assert ("extract_seconds", "find_job_items") in timed
+    assert ("extract_seconds", "extract_job_tech_stack_from_result") in timed
+    # The report is valid JSON
+    assert json.loads(registry.to_json())["counters"]
+
+
+if __name__ == "__main__":
+    pytest.main()
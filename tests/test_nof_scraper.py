@@ -58,5 +58,56 @@ def test_extract_company_name_from_subpage(sample_soup):
     assert company_name == "Company Name"
 
 
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_subpage_parsing(parser):
+    html_input = """
+    <html><head><script>var big = 1;</script></head><body>
+    <header><a id='postingCompanyUrl'> Company Name </a></header>
+    <div><p>Unrelated text</p></div>
+    <section branch='musts'><ul><li>Python</li><li>SQL</li></ul></section>
+    <div>
+        <h2>projekt rövid leírása</h2>
+        <nfj-read-more><div>Job Summary Text</div></nfj-read-more>
+    </div>
+    </body></html>
+    """
+    scraper = NofScraper("https://example.com", parser=parser)
+    soup = scraper.make_soup(html_input, scraper.subpage_parse_only)
+    assert scraper.extract_job_tech_stack_from_result(soup) == ["Python", "SQL"]
+    assert scraper.extract_job_summary_from_subpage(soup) == "Job Summary Text"
+    assert scraper.extract_company_name_from_subpage(soup) == "Company Name"
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_summary_heading_without_summary(parser):
+    html_input = """
+    <html><body>
+    <a id='postingCompanyUrl'>Company Name</a>
+    <section branch='musts'><ul><li>Python</li></ul></section>
+    <div><h2>A projekt rövid leírása</h2><p>Coming soon</p></div>
+    <div>
+        <h2>Benefits</h2>
+        <nfj-read-more><div>Free fruit</div></nfj-read-more>
+    </div>
+    </body></html>
+    """
+    scraper = NofScraper("https://example.com", parser=parser)
+    soup = scraper.make_soup(html_input, scraper.subpage_parse_only)
+    # The read-more block of another heading is not taken as the summary
+    assert scraper.extract_job_summary_from_subpage(soup) == ""
+
+
+def test_find_last_page():
+    html_input = """
+    <a class="posting-list-item" href="/job/1"></a>
+    <nfj-pagination><ul class="pagination">
+        <li class="page-item"><a class="page-link" href="?page=1">1</a></li>
+        <li class="page-item"><a class="page-link" href="?page=7">7</a></li>
+        <li class="page-item"><a class="page-link" href="?page=2">»</a></li>
+    </ul></nfj-pagination>
+    """
+    assert NofScraper("https://example.com").find_last_page(html_input) == 7
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -58,6 +58,16 @@ def test_extract_job_tech_stack_from_result(sample_soup):
     assert tech_stack_list == []
 
 
+def test_main_page_partial_parsing(sample_soup):
+    scraper = PrfScraper("https://example.com")
+    html_input = (
+        f"<html><body><nav><ul><li>Menu</li></ul></nav>{sample_soup}</body></html>"
+    )
+    soup = scraper.make_soup(html_input, scraper.main_page_parse_only)
+    assert soup.find("nav") is None
+    assert len(scraper.find_job_items(soup)) == 2
+
+
 # Run the tests
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,106 @@
+import os
+import sys
+import pstats
+import pytest
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts import profiling
+
+
+def count_words(count):
+    return sum(len(str(num)) for num in range(count))
+
+
+def build_lists(count):
+    return [[num] * 10 for num in range(count)]
+
+
+@pytest.fixture
+def profiled(tmp_path):
+    yield lambda stages, mode: profiling.configure(stages, mode, str(tmp_path))
+    profiling.configure([], "cpu")
+    profiling.reset()
+
+
+def test_disabled_stage_is_not_profiled(profiled, tmp_path):
+    profiled(["load"], "both")
+    with profiling.profile_stage("analyze"):
+        count_words(1000)
+    assert profiling.write_profiles() == []
+    assert not os.listdir(tmp_path)
+
+
+def test_nested_stages_have_their_own_profiles(profiled, tmp_path):
+    profiled(["analyze", "parse"], "both")
+    for _ in range(2):
+        with profiling.profile_stage("analyze"):
+            count_words(10000)
+            with profiling.profile_stage("parse"):
+                build_lists(10000)
+
+    paths = profiling.write_profiles()
+
+    names = sorted(os.path.basename(path).split("-", 2)[2] for path in paths)
+    assert names == [
+        "analyze-cpu.txt",
+        "analyze-memory.txt",
+        "analyze.pstats",
+        "analyze.tracemalloc",
+        "parse-cpu.txt",
+        "parse-memory.txt",
+        "parse.pstats",
+        "parse.tracemalloc",
+    ]
+    functions = {
+        stage: {
+            function[2]: stats[0]
+            for function, stats in pstats.Stats(
+                next(path for path in paths if path.endswith(f"{stage}.pstats"))
+            ).stats.items()
+        }
+        for stage in ("analyze", "parse")
+    }
+    # The time of the nested stage is only in its own profile
+    assert functions["analyze"]["count_words"] == 2
+    assert "build_lists" not in functions["analyze"]
+    assert functions["parse"]["build_lists"] == 2
+    memory_summary = next(path for path in paths if path.endswith("parse-memory.txt"))
+    with open(memory_summary, encoding="utf-8") as summary_file:
+        assert summary_file.readline().startswith("parse: 2 calls, peak traced memory")
+
+
+def test_memory_peak_of_a_nested_stage(profiled):
+    profiled(["analyze", "parse"], "memory")
+    with profiling.profile_stage("analyze"):
+        lists = build_lists(100_000)
+        del lists
+        # The freed memory of the outer stage is not credited to this one
+        with profiling.profile_stage("parse"):
+            count_words(1000)
+    paths = profiling.write_profiles()
+    peaks = {
+        stage: stage_peak["peak"]
+        for stage, stage_peak in profiling._memory_peaks.items()
+    }
+    assert peaks["parse"] * 10 < peaks["analyze"]
+    memory_summary = next(path for path in paths if path.endswith("parse-memory.txt"))
+    with open(memory_summary, encoding="utf-8") as summary_file:
+        summary_file.readline()
+        assert summary_file.readline() == (
+            "Largest allocation sites at the end of the stage:\n"
+        )
+
+
+def test_unknown_stage(profiled):
+    with pytest.raises(ValueError):
+        profiled(["render"], "cpu")
+
+
+if __name__ == "__main__":
+    pytest.main()
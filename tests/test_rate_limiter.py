@@ -0,0 +1,103 @@
+import os
+import sys
+import pytest
+from email.utils import formatdate
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.rate_limiter import (
+    AdaptiveRateLimiter,
+    RECOVERY_THRESHOLD,
+    parse_retry_after,
+)
+from scripts.transport import Transport
+
+
+class FakeClock:
+    """Clock whose sleep advances the time instead of waiting"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return AdaptiveRateLimiter(
+        rate=2.0, min_rate=0.5, max_rate=4.0, burst=2, clock=clock, sleep=clock.sleep
+    )
+
+
+def test_burst_then_steady_rate(limiter, clock):
+    waits = [limiter.acquire("https://a.example/job") for _ in range(5)]
+    assert waits == [0.0, 0.0, 0.5, 0.5, 0.5]
+    assert clock.now == pytest.approx(101.5)
+
+
+def test_hosts_are_limited_independently(limiter):
+    for _ in range(2):
+        limiter.acquire("https://a.example/job")
+    assert limiter.acquire("https://b.example/job") == 0.0
+    assert limiter.acquire("https://a.example/job") > 0
+
+
+def test_backoff_and_retry_after(limiter, clock):
+    limiter.record_response("https://a.example/job", 429, retry_after="30")
+    assert limiter.rate("https://a.example/") == 1.0
+    assert limiter.acquire("https://a.example/job") == 30.0
+    # Other hosts are not affected
+    assert limiter.acquire("https://b.example/job") == 0.0
+
+    limiter.record_response("https://a.example/job", 503)
+    limiter.record_response("https://a.example/job", 503)
+    assert limiter.rate("https://a.example/") == 0.5
+
+
+def test_recovery_while_healthy(limiter):
+    limiter.record_response("https://a.example/job", 429)
+    for _ in range(RECOVERY_THRESHOLD):
+        limiter.record_response("https://a.example/job", 200)
+    assert limiter.rate("https://a.example/") == 1.25
+    for _ in range(RECOVERY_THRESHOLD * 20):
+        limiter.record_response("https://a.example/job", 200)
+    assert limiter.rate("https://a.example/") == 4.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("soon") is None
+    http_date = formatdate(usegmt=True)
+    assert 0.0 <= parse_retry_after(http_date) <= 1.0
+
+
+def test_transport_reports_to_limiter(stub_server, clock):
+    stub_server.add_page("/busy", "", status=429, headers={"Retry-After": "7"})
+    limiter = AdaptiveRateLimiter(rate=1.0, clock=clock, sleep=clock.sleep)
+    transport = Transport(rate_limiter=limiter)
+    transport.get(f"{stub_server.url}/busy")
+    transport.get(f"{stub_server.url}/busy")
+    transport.close()
+    assert clock.sleeps == [7.0]
+    assert limiter.rate(stub_server.url) == 0.25
+
+
+if __name__ == "__main__":
+    pytest.main()
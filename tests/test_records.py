@@ -0,0 +1,63 @@
+import os
+import sys
+import pandas as pd
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.records import (
+    JOB_COLUMNS,
+    JobRecord,
+    frame_to_records,
+    records_to_frame,
+)
+
+
+def test_record_unpacks_as_the_scraped_fields():
+    record = JobRecord("Job", "Company", "Summary", "https://example.com/1", ["SQL"])
+    job_title, company_name, job_summary, job_link, job_tech_stack = record
+    assert (job_title, job_link, job_tech_stack) == (
+        "Job",
+        "https://example.com/1",
+        ["SQL"],
+    )
+    # Slotted: no per-record __dict__
+    assert not hasattr(record, "__dict__")
+
+
+def test_dict_round_trip_keeps_the_optional_columns():
+    row = {
+        "job_title": "Job",
+        "job_link": "https://example.com/1",
+        "duplicate_of": None,
+        # Columns of the tables that are not job fields are ignored
+        "first_seen": "2024-01-01",
+    }
+    record = JobRecord.from_dict(row)
+    assert record.deduplicated
+    assert record.to_dict() == {
+        "job_title": "Job",
+        "company_name": None,
+        "job_summary": None,
+        "job_link": "https://example.com/1",
+        "job_tech_stack": None,
+        "duplicate_of": None,
+    }
+    assert "duplicate_of" not in JobRecord(job_title="Job").to_dict()
+
+
+def test_records_to_frame():
+    records = [
+        JobRecord("Job 1", job_link="https://example.com/1", job_tech_stack=["SQL"]),
+        JobRecord("Job 2", job_link="https://example.com/2", matched_queries="a,b"),
+    ]
+    df = records_to_frame(records)
+    assert list(df.columns) == JOB_COLUMNS + ["matched_queries"]
+    assert df.loc[0, "job_tech_stack"] == ["SQL"]
+    assert pd.isna(df.loc[0, "matched_queries"])
+    assert frame_to_records(df)[1].job_link == "https://example.com/2"
+    assert list(records_to_frame([]).columns) == JOB_COLUMNS
@@ -0,0 +1,131 @@
+import os
+import sys
+import random
+import pytest
+import requests
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.retry import CircuitBreaker, RetryPolicy
+from scripts.transport import CircuitOpenError, FetchError, Transport
+
+
+class FakeClock:
+    """Clock whose sleep advances the time instead of waiting"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, rng=random.Random(1))
+    for retry_num, limit in enumerate([1.0, 2.0, 4.0, 5.0, 5.0]):
+        delays = [policy.delay(retry_num) for _ in range(50)]
+        assert all(0 <= delay <= limit for delay in delays)
+        # Full jitter spreads the retries over the whole interval
+        assert max(delays) > limit / 2
+
+
+def test_circuit_opens_and_half_opens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+    url = "https://a.example/job"
+    for _ in range(3):
+        assert breaker.allow(url)
+        breaker.record_failure(url)
+    assert not breaker.allow(url)
+    # Other hosts are not affected
+    assert breaker.allow("https://b.example/job")
+
+    clock.now += 60
+    # One trial request, then open again until it succeeds
+    assert breaker.allow(url)
+    assert not breaker.allow(url)
+    breaker.record_success(url)
+    assert breaker.allow(url)
+    assert not breaker.is_open(url)
+
+
+def test_transient_errors_are_retried(stub_server, clock):
+    stub_server.add_page("/page", "<html></html>")
+    stub_server.add_failures("/page", 503, 500)
+    transport = Transport(retry_policy=RetryPolicy(sleep=clock.sleep))
+    response = transport.get(f"{stub_server.url}/page")
+    transport.close()
+    assert response.status_code == 200
+    assert len(stub_server.requests) == 3
+    assert len(clock.sleeps) == 2
+    assert transport.stats()["retries"] == 2
+
+
+def test_truncated_bodies_are_retried(stub_server, clock):
+    stub_server.add_page("/page", "<html></html>")
+    transport = Transport(retry_policy=RetryPolicy(sleep=clock.sleep))
+    session_get = transport.session.get
+    tries = []
+
+    def get(url, **kwargs):
+        tries.append(url)
+        if len(tries) == 1:
+            # The connection is dropped in the middle of the body
+            raise requests.exceptions.ChunkedEncodingError("IncompleteRead")
+        return session_get(url, **kwargs)
+
+    transport.session.get = get
+    response = transport.get(f"{stub_server.url}/page")
+    transport.close()
+    assert response.text == "<html></html>"
+    assert len(tries) == 2
+    assert transport.stats()["retries"] == 1
+
+
+def test_permanent_errors_are_not_retried(stub_server, clock):
+    transport = Transport(retry_policy=RetryPolicy(sleep=clock.sleep))
+    assert transport.get(f"{stub_server.url}/missing").status_code == 404
+    transport.close()
+    assert len(stub_server.requests) == 1
+
+
+def test_last_error_response_is_returned(stub_server, clock):
+    stub_server.add_page("/page", "<html></html>")
+    stub_server.add_failures("/page", 502, 502, 502)
+    transport = Transport(retry_policy=RetryPolicy(max_attempts=3, sleep=clock.sleep))
+    assert transport.get(f"{stub_server.url}/page").status_code == 502
+    transport.close()
+    assert transport.stats()["failures"] == 1
+
+
+def test_connection_errors_open_the_circuit(clock):
+    transport = Transport(
+        retry_policy=RetryPolicy(max_attempts=2, sleep=clock.sleep),
+        circuit_breaker=CircuitBreaker(failure_threshold=2, clock=clock),
+        timeout=(1, 1),
+    )
+    with pytest.raises(FetchError):
+        transport.get("http://127.0.0.1:1/job/1")
+    # The host is not requested again while the circuit is open
+    with pytest.raises(CircuitOpenError):
+        transport.get("http://127.0.0.1:1/job/2")
+    transport.close()
+    assert transport.stats()["requests"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import pandas as pd
+import pytest
+from sqlalchemy import TEXT
+from unittest.mock import MagicMock, patch
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.storage import PostgresBackend, SQLiteBackend, get_backend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return get_backend(f"sqlite:///{tmp_path / 'jobs.db'}")
+
+
+@pytest.fixture
+def job_data():
+    return pd.DataFrame(
+        {
+            "job_title": ["Job 1", "Job 2", "Job 3"],
+            "company_name": ["Company 1", "", None],
+            "job_link": [f"https://example.com/{num}" for num in range(1, 4)],
+            "job_tech_stack": [["SQL", 'Say "hi"'], [], None],
+        }
+    )
+
+
+def test_get_backend():
+    assert isinstance(get_backend("sqlite://"), SQLiteBackend)
+    assert get_backend("sqlite://") is get_backend("sqlite://")
+    with patch("scripts.storage.create_engine"):
+        postgres_backend = get_backend("postgresql://user@localhost/db")
+    assert isinstance(postgres_backend, PostgresBackend)
+
+
+def test_sqlite_uses_wal(backend):
+    assert backend.read_query("PRAGMA journal_mode").iloc[0, 0] == "wal"
+
+
+def test_write_replace_and_append(backend, job_data):
+    backend.write("jobs", job_data, if_exists="replace")
+    backend.write("jobs", job_data.head(1), if_exists="append")
+    stored = backend.read_query("SELECT * FROM jobs")
+    assert len(stored) == 4
+    assert stored["company_name"][1] == ""
+    assert pd.isna(stored["company_name"][2])
+
+    backend.write("jobs", job_data.head(2), if_exists="replace")
+    assert len(backend.read_query("SELECT * FROM jobs")) == 2
+
+
+def test_sqlite_tech_stacks_in_child_table(backend, job_data):
+    backend.write("jobs", job_data, if_exists="replace")
+    assert "job_tech_stack" not in backend.read_query("SELECT * FROM jobs")
+    assert len(backend.read_query("SELECT * FROM jobs_tech")) == 2
+    stored = backend.read_table("jobs")
+    assert list(stored["job_tech_stack"]) == [["SQL", 'Say "hi"'], [], []]
+
+
+def test_read_table_by_links(backend, job_data):
+    backend.write("jobs", job_data, if_exists="replace")
+    links = ["https://example.com/1", "https://example.com/3"]
+    stored = backend.read_table("jobs", ["job_link", "job_tech_stack"], links)
+    assert list(stored["job_link"]) == links
+    assert list(stored["job_tech_stack"]) == [["SQL", 'Say "hi"'], []]
+    assert backend.read_table("jobs", links=[]).empty
+
+
+def test_upsert(backend, job_data):
+    backend.upsert("jobs", job_data.head(2))
+    update = job_data.tail(2).assign(
+        job_title=["Job 2 renamed", "Job 3"], job_tech_stack=[["Go"], ["Java"]]
+    )
+    backend.upsert("jobs", update)
+    # A job with a skipped subpage keeps its stored tech stack
+    backend.upsert("jobs", job_data.head(1).assign(job_tech_stack=[None]))
+    stored = backend.read_table("jobs").sort_values("job_link", ignore_index=True)
+    assert list(stored["job_title"]) == ["Job 1", "Job 2 renamed", "Job 3"]
+    assert list(stored["job_tech_stack"]) == [["SQL", 'Say "hi"'], ["Go"], ["Java"]]
+    assert backend.fetch_known_links("jobs") == set(job_data["job_link"])
+    assert not backend.has_table("jobs_staging")
+
+
+def test_upsert_resets_duplicate_of(backend, job_data):
+    duplicate = job_data.tail(1).assign(duplicate_of=["https://example.com/1"])
+    backend.upsert("jobs", duplicate)
+    # The posting no longer matches its original
+    backend.upsert("jobs", duplicate.assign(duplicate_of=[None]))
+    stored = backend.read_table("jobs")
+    assert stored["duplicate_of"].isna().all()
+
+
+def test_postgres_bulk_insert_uses_copy(job_data):
+    with patch("scripts.storage.create_engine"):
+        postgres_backend = PostgresBackend("postgresql://user@localhost/db")
+    copied = {}
+
+    class FakeCursor:
+        def copy_expert(self, sql, buffer):
+            copied["sql"] = sql
+            copied["data"] = buffer.read()
+
+        def close(self):
+            pass
+
+    conn = MagicMock()
+    conn.connection.cursor.return_value = FakeCursor()
+    postgres_backend.bulk_insert(conn, "jobs", job_data)
+
+    assert copied["sql"].startswith('COPY jobs ("job_title", "company_name"')
+    # Empty strings and NULLs stay distinct
+    assert copied["data"].splitlines() == [
+        'Job 1,Company 1,https://example.com/1,"{""SQL"",""Say \\""hi\\""""}"',
+        "Job 2,,https://example.com/2,{}",
+        "Job 3,\\N,https://example.com/3,\\N",
+    ]
+
+
+def test_tech_counts(backend):
+    backend.write(
+        "jobs_prf",
+        pd.DataFrame(
+            {
+                "job_title": ["Data Engineer", "Java developer"],
+                "job_link": ["https://example.com/1", "https://example.com/2"],
+                "job_tech_stack": [["Python", "Angol (B2)"], ["Java", "SQL"]],
+            }
+        ),
+    )
+    backend.write(
+        "jobs_nof",
+        pd.DataFrame(
+            {
+                "job_title": ["Senior data engineer"],
+                "job_link": ["https://example.com/3"],
+                "job_tech_stack": [["python", "SQL", "ANGOL C1"]],
+            }
+        ),
+    )
+    counts = backend.tech_counts(
+        ["jobs_prf", "jobs_nof"], ("Data", "engineer"), ["ANGOL"]
+    )
+    assert counts.to_dict() == {"ANGOL": 2, "PYTHON": 2, "SQL": 1}
+    assert list(counts.index) == ["ANGOL", "PYTHON", "SQL"]
+
+
+def test_tech_counts_skip_duplicates(backend):
+    jobs = pd.DataFrame(
+        {
+            "job_title": ["Data engineer", "Data engineer"],
+            "job_link": ["https://example.com/1", "https://example.com/2"],
+            "job_tech_stack": [["Python"], ["Python", "SQL"]],
+        }
+    )
+    backend.upsert("jobs", jobs)
+    # A table without the column gets it on the next upsert
+    backend.upsert("jobs", jobs.tail(1).assign(duplicate_of=["https://example.com/1"]))
+    counts = backend.tech_counts(["jobs"], ("Data", "engineer"))
+    assert counts.to_dict() == {"PYTHON": 1}
+
+
+def test_sqlite_migrates_json_tech_stacks(backend):
+    # Table written by the earlier versions, with the tech stacks as JSON
+    pd.DataFrame(
+        {
+            "job_title": ["Data engineer", "Data engineer", "Data engineer"],
+            "job_link": [f"https://example.com/{num}" for num in range(1, 4)],
+            "job_tech_stack": ['["Python", "N\\u00e9met"]', '["SQL"]', "null"],
+        }
+    ).to_sql("jobs", backend.engine, index=False)
+
+    # The next incremental write keeps the stored tech stacks
+    backend.upsert(
+        "jobs",
+        pd.DataFrame(
+            {
+                "job_title": ["Data engineer", "Data engineer"],
+                "job_link": ["https://example.com/2", "https://example.com/4"],
+                "job_tech_stack": [["Go"], ["Java"]],
+            }
+        ),
+    )
+    stored = backend.read_table("jobs").sort_values("job_link", ignore_index=True)
+    assert list(stored["job_tech_stack"]) == [
+        ["Python", "Német"],
+        ["Go"],
+        [],
+        ["Java"],
+    ]
+    assert "job_tech_stack" not in backend.read_query("SELECT * FROM jobs")
+    counts = backend.tech_counts(["jobs"], ("Data", "engineer"))
+    assert counts.to_dict() == {"GO": 1, "JAVA": 1, "NÉMET": 1, "PYTHON": 1}
+
+
+@pytest.mark.parametrize("json_tech_stacks", [True, False])
+def test_migration_drops_duplicate_links(backend, json_tech_stacks):
+    # Full load of an earlier version, finding job 1 twice
+    jobs = pd.DataFrame(
+        {
+            "job_title": ["Job 1", "Job 2", "Job 1 again"],
+            "job_link": [f"https://example.com/{num}" for num in (1, 2, 1)],
+            "job_tech_stack": [["SQL"], ["Go"], ["SQL"]],
+        }
+    )
+    if json_tech_stacks:
+        jobs["job_tech_stack"] = jobs["job_tech_stack"].map(json.dumps)
+        jobs.to_sql("jobs", backend.engine, index=False)
+    else:
+        backend.write("jobs", jobs, if_exists="replace")
+        backend._migrated_tables.clear()
+
+    backend.upsert(
+        "jobs",
+        pd.DataFrame({"job_title": ["Job 3"], "job_link": ["https://example.com/3"]}),
+    )
+    stored = backend.read_table("jobs").sort_values("job_link", ignore_index=True)
+    assert list(stored["job_title"]) == ["Job 1 again", "Job 2", "Job 3"]
+    assert list(stored["job_tech_stack"]) == [["SQL"], ["Go"], []]
+
+
+def test_postgres_migrates_json_tech_stacks():
+    with patch("scripts.storage.create_engine"):
+        postgres_backend = PostgresBackend("postgresql://user@localhost/db")
+    inspector = MagicMock()
+    inspector.get_columns.return_value = [
+        {"name": "job_link", "type": TEXT()},
+        {"name": "job_tech_stack", "type": TEXT()},
+    ]
+    inspector.get_indexes.return_value = []
+    with patch("scripts.storage.inspect", return_value=inspector):
+        postgres_backend.migrate_table("jobs")
+        postgres_backend.migrate_table("jobs")
+    conn = postgres_backend.engine.begin.return_value.__enter__.return_value
+    statements = [str(call.args[0]) for call in conn.execute.call_args_list]
+    assert statements == [
+        "DELETE FROM jobs AS job USING jobs AS later "
+        "WHERE job.job_link = later.job_link AND job.ctid < later.ctid",
+        "ALTER TABLE jobs RENAME COLUMN job_tech_stack TO job_tech_stack_json",
+        "ALTER TABLE jobs ADD COLUMN job_tech_stack VARCHAR[]",
+        "UPDATE jobs SET job_tech_stack = ARRAY(SELECT json_array_elements_text("
+        "CAST(job_tech_stack_json AS json))) "
+        "WHERE json_typeof(CAST(job_tech_stack_json AS json)) = 'array'",
+        "ALTER TABLE jobs DROP COLUMN job_tech_stack_json",
+    ]
+
+
+def test_postgres_tech_rows_query():
+    with patch("scripts.storage.create_engine"):
+        postgres_backend = PostgresBackend("postgresql://user@localhost/db")
+    query = postgres_backend.tech_rows_query("jobs", "LOWER(job_title) LIKE :kw")
+    assert query == (
+        "SELECT unnest(job_tech_stack) AS tech FROM jobs "
+        "WHERE LOWER(job_title) LIKE :kw"
+    )
+
+
+if __name__ == "__main__":
+    pytest.main()
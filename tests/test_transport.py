@@ -0,0 +1,50 @@
+import os
+import sys
+import pytest
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.transport import Transport
+from scripts.pagescrapers.prf_scraper import PrfScraper
+
+
+def test_connections_are_reused(stub_server):
+    stub_server.add_page("/page", "<html></html>")
+    transport = Transport()
+    for _ in range(5):
+        assert transport.get(f"{stub_server.url}/page").status_code == 200
+    stats = transport.stats()
+    transport.close()
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert stats["reused_connections"] == 4
+
+
+def test_compression_and_keep_alive_headers(stub_server):
+    stub_server.add_page("/page", "<html></html>")
+    transport = Transport()
+    transport.get(f"{stub_server.url}/page")
+    transport.close()
+    sent_headers = stub_server.requests[0][1]
+    assert "gzip" in sent_headers["Accept-Encoding"]
+    assert sent_headers["Connection"] == "keep-alive"
+
+
+def test_scrapers_share_injected_transport(stub_server):
+    stub_server.add_page("/list", '<ul class="job-cards"></ul>')
+    transport = Transport()
+    for _ in range(3):
+        scraper = PrfScraper(f"{stub_server.url}/list", transport=transport)
+        assert scraper.transport is transport
+        assert scraper.scrape_main_page().empty
+    assert transport.stats()["connections"] == 1
+    transport.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
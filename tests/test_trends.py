@@ -0,0 +1,150 @@
+import os
+import sys
+from datetime import date
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.storage import get_backend
+from scripts.trends import (
+    SnapshotRecorder,
+    analyze_trend_from_db,
+    read_tech_trend,
+    update_snapshot,
+)
+from scripts.records import JobRecord
+from unittest.mock import patch
+
+QUERY = "data engineer"
+
+
+def job(num, techs, title="Data engineer", **columns):
+    return JobRecord(
+        job_title=title,
+        job_link=f"https://example.com/{num}",
+        job_tech_stack=techs,
+        **columns,
+    )
+
+
+def crawl(backend, day, records, site="prf", **save_options):
+    recorder = SnapshotRecorder(site, [QUERY], day)
+    for record in recorder.track(records):
+        pass
+    recorder.save(backend, **save_options)
+
+
+def trend_counts(backend, day, site="prf"):
+    counts = backend.read_query(
+        "SELECT tech, count FROM tech_trend WHERE site = :site "
+        "AND snapshot_date = :day",
+        {"site": site, "day": day.isoformat()},
+    )
+    return dict(zip(counts["tech"], counts["count"]))
+
+
+def test_counts_are_updated_from_the_changed_postings(tmp_path):
+    backend = get_backend(f"sqlite:///{tmp_path / 'jobs.db'}")
+    crawl(
+        backend,
+        date(2024, 1, 1),
+        [
+            job(1, ["Python", "Spark"]),
+            job(2, ["python", "Angol (B2)"]),
+            # Not counted, as in the analysis
+            job(3, ["Java"], title="Java developer"),
+            job(4, ["Spark"], duplicate_of="https://example.com/1"),
+        ],
+    )
+    assert trend_counts(backend, date(2024, 1, 1)) == {
+        "PYTHON": 2,
+        "SPARK": 1,
+        "ANGOL": 1,
+    }
+
+    # Job 1 is gone, job 2 is known and not scraped again, job 5 is new
+    crawl(backend, date(2024, 1, 2), [job(2, None), job(5, ["Spark", "Scala"])])
+    assert trend_counts(backend, date(2024, 1, 2)) == {
+        "PYTHON": 1,
+        "SPARK": 1,
+        "ANGOL": 1,
+        "SCALA": 1,
+    }
+    # Crawling the same day again replaces the snapshot of the day
+    crawl(backend, date(2024, 1, 2), [job(2, None)])
+    assert trend_counts(backend, date(2024, 1, 2)) == {
+        "PYTHON": 1,
+        "SPARK": 0,
+        "ANGOL": 1,
+    }
+    snapshot = backend.read_query(
+        "SELECT job_link FROM job_snapshots WHERE snapshot_date = '2024-01-02'"
+    )
+    assert list(snapshot["job_link"]) == ["https://example.com/2"]
+    # The zero count of a technology is only written on the day it is gone
+    crawl(backend, date(2024, 1, 3), [job(2, None)])
+    assert trend_counts(backend, date(2024, 1, 3)) == {"PYTHON": 1, "ANGOL": 1}
+    trend = read_tech_trend(backend, QUERY)
+    assert list(trend["SPARK"]) == [1, 0, 0]
+
+
+def test_postings_of_failed_pages_are_kept(tmp_path):
+    backend = get_backend(f"sqlite:///{tmp_path / 'jobs.db'}")
+    crawl(backend, date(2024, 1, 1), [job(1, ["Python"]), job(2, ["SQL"])])
+    # The subpage of job 2 failed
+    crawl(
+        backend,
+        date(2024, 1, 2),
+        [job(1, ["Python"])],
+        kept_links={QUERY: {"https://example.com/2"}},
+    )
+    assert trend_counts(backend, date(2024, 1, 2)) == {"PYTHON": 1, "SQL": 1}
+    # A result page failed: the jobs not found are not removed
+    crawl(backend, date(2024, 1, 3), [job(3, ["Go"])], kept_links={QUERY: None})
+    assert trend_counts(backend, date(2024, 1, 3)) == {"PYTHON": 1, "SQL": 1, "GO": 1}
+
+
+def test_known_jobs_are_looked_up_once(tmp_path):
+    backend = get_backend(f"sqlite:///{tmp_path / 'jobs.db'}")
+    looked_up = []
+
+    def lookup(links):
+        looked_up.extend(links)
+        return {link: job(1, ["Rust"]) for link in links}
+
+    update_snapshot(
+        backend, "prf", QUERY, {"https://example.com/1": None}, lookup=lookup
+    )
+    update_snapshot(
+        backend,
+        "prf",
+        QUERY,
+        {"https://example.com/1": None},
+        date(2099, 1, 1),
+        lookup=lookup,
+    )
+    assert looked_up == ["https://example.com/1"]
+    assert trend_counts(backend, date(2099, 1, 1)) == {"RUST": 1}
+
+
+def test_read_tech_trend_sums_the_sites(tmp_path):
+    backend = get_backend(f"sqlite:///{tmp_path / 'jobs.db'}")
+    crawl(backend, date(2024, 1, 1), [job(1, ["Spark"]), job(2, ["Spark"])])
+    crawl(backend, date(2024, 1, 1), [job(3, ["Spark"])], site="nof")
+    crawl(backend, date(2024, 1, 2), [job(1, ["Spark"])])
+    # The nof site is not crawled on the 2nd: its last snapshot counts
+    crawl(backend, date(2024, 1, 3), [job(3, ["Spark"]), job(4, ["Spark"])], "nof")
+
+    trend = read_tech_trend(backend, QUERY, ["spark"])
+    assert [day.day for day in trend.index] == [1, 2, 3]
+    assert list(trend["SPARK"]) == [3, 2, 3]
+    assert read_tech_trend(backend, QUERY, start_date=date(2024, 1, 3)).shape == (1, 1)
+
+    output_path = tmp_path / "trend.png"
+    with patch("scripts.trends.DB_URI", f"sqlite:///{tmp_path / 'jobs.db'}"):
+        analyze_trend_from_db(output_path=str(output_path), query=QUERY)
+    assert output_path.stat().st_size > 0
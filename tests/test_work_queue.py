@@ -0,0 +1,93 @@
+import os
+import sys
+import multiprocessing
+
+# Get the absolute path of the current script
+current_parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Calculate the path to the 'scripts' directory which is at the same level as 'tests'
+scripts_path = os.path.join(current_parent_dir, "scripts")
+# Add the 'scripts' directory to sys.path
+sys.path.append(scripts_path)
+
+from scripts.work_queue import DONE, FAILED, PENDING, WorkQueue
+
+
+def test_tasks_are_added_once(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    assert queue.add("listing", "prf", "https://example.com/1", {"page_num": 1})
+    assert not queue.add("listing", "prf", "https://example.com/1", {"page_num": 1})
+    assert queue.add("listing", "nof", "https://example.com/1")
+    assert queue.counts() == {PENDING: 2}
+    queue.close()
+
+
+def test_claim_complete_and_store(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    queue.add("subpage", "prf", "https://example.com/job/1", {"item": "<li></li>"})
+    task = queue.claim("worker-0")
+    assert task.url == "https://example.com/job/1"
+    assert task.payload == {"item": "<li></li>"}
+    assert queue.claim("worker-1") is None
+    assert not queue.is_finished()
+
+    queue.complete(task, {"job_link": task.url})
+    assert queue.is_finished()
+    assert queue.unstored_results(10) == [(task.id, "prf", {"job_link": task.url})]
+    queue.mark_stored([task.id])
+    assert queue.unstored_results(10) == []
+    assert queue.counts() == {DONE: 1}
+    queue.close()
+
+
+def test_failed_task_is_retried_then_left_failed(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    queue.add("subpage", "prf", "https://example.com/job/1")
+    for _ in range(2):
+        queue.fail(queue.claim("worker-0"), "timeout", max_attempts=2)
+    assert queue.claim("worker-0") is None
+    assert queue.counts() == {FAILED: 1}
+    assert [task.url for task in queue.failed_tasks()] == ["https://example.com/job/1"]
+    queue.close()
+
+
+def test_interrupted_tasks_are_resumed(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = WorkQueue(path)
+    queue.add("subpage", "prf", "https://example.com/job/1")
+    queue.claim("worker-0")
+    # The worker crashed, the queue is opened again by the next run
+    queue.close()
+    queue = WorkQueue(path)
+    assert queue.reset_in_progress() == 1
+    assert queue.claim("worker-1").url == "https://example.com/job/1"
+    queue.close()
+
+
+def claim_all(path, worker, claimed):
+    queue = WorkQueue(path)
+    while (task := queue.claim(worker)) is not None:
+        claimed.append(task.id)
+        queue.complete(task)
+    queue.close()
+
+
+def test_workers_never_claim_the_same_task(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = WorkQueue(path)
+    with queue.transaction():
+        for num in range(200):
+            queue.add("subpage", "prf", f"https://example.com/job/{num}")
+    with multiprocessing.Manager() as manager:
+        claimed = manager.list()
+        workers = [
+            multiprocessing.Process(target=claim_all, args=(path, f"w{num}", claimed))
+            for num in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        claimed = list(claimed)
+    assert sorted(claimed) == list(range(1, 201))
+    assert queue.counts() == {DONE: 200}
+    queue.close()